@@ -19,10 +19,12 @@ from chartfold.models import (
 )
 from chartfold.sources.mhtml_test_result import ParsedTestResult
 
+_VAF_RE = re.compile(r"([\d.]+)\s*%?")
+
 
 def _parse_vaf(raw: str) -> float | None:
     """Parse VAF string like '53.2%' to float 53.2."""
-    match = re.match(r"([\d.]+)\s*%?", raw.strip())
+    match = _VAF_RE.match(raw.strip())
     if match:
         try:
             return float(match.group(1))
@@ -50,6 +50,11 @@ def _infer_modality(study_name: str) -> str:
     return ""
 
 
+def _content_hash(image_bytes: bytes) -> str:
+    """Short content hash used as the image file stem."""
+    return hashlib.sha256(image_bytes).hexdigest()[:16]
+
+
 def _parser_counts(data: ParsedVisit) -> dict[str, int]:
     """Count records in parser output before adapter transformation."""
     return {
@@ -120,7 +125,7 @@ def mychart_to_unified(
     seen_hashes: set[str] = set()
 
     for uuid, image_bytes in data.images.items():
-        content_hash = hashlib.sha256(image_bytes).hexdigest()[:16]
+        content_hash = _content_hash(image_bytes)
         if content_hash in seen_hashes:
             continue  # Same image already added from this MHTML
         seen_hashes.add(content_hash)
@@ -172,7 +177,7 @@ def save_images(data: ParsedVisit, output_dir: str) -> dict[str, str]:
 
     saved: dict[str, str] = {}
     for uuid, image_bytes in data.images.items():
-        content_hash = hashlib.sha256(image_bytes).hexdigest()[:16]
+        content_hash = _content_hash(image_bytes)
         file_path = out / f"{content_hash}.png"
         if not file_path.exists():
             file_path.write_bytes(image_bytes)
@@ -312,6 +312,17 @@ def _print_load_result(
     adapter_counts: dict[str, int],
 ) -> None:
     """Print pipeline comparison + diff summary from load result."""
+    text = _format_load_result(result, parser_counts, adapter_counts)
+    if text:
+        print(text)
+
+
+def _format_load_result(
+    result: dict,
+    parser_counts: dict[str, int],
+    adapter_counts: dict[str, int],
+) -> str:
+    """Render the stage comparison table and diff summary ("" if no rows)."""
     table_stats = result["tables"]
 
     # Collect all table names from all sources
@@ -360,15 +371,18 @@ def _print_load_result(
         rows.append((key, p, a, total, diff, flag))
 
     if not rows:
-        return
+        return ""
 
-    print("\n  Stage Comparison:")
-    print(f"    {'Table':<22} {'Parser':>7}  {'Adapt':>7}  {'Load':>7}  {'Diff'}")
-    print(f"    {'-' * 22} {'-' * 7}  {'-' * 7}  {'-' * 7}  {'-' * 14}")
+    lines = [
+        "",
+        "  Stage Comparison:",
+        f"    {'Table':<22} {'Parser':>7}  {'Adapt':>7}  {'Load':>7}  {'Diff'}",
+        f"    {'-' * 22} {'-' * 7}  {'-' * 7}  {'-' * 7}  {'-' * 14}",
+    ]
     for key, p, a, total, diff, flag in rows:
         p_str = str(p) if p != "" else "-"
         a_str = str(a) if a != "" else "-"
-        print(f"    {key:<22} {p_str:>7}  {a_str:>7}  {total:>7}  {diff}{flag}")
+        lines.append(f"    {key:<22} {p_str:>7}  {a_str:>7}  {total:>7}  {diff}{flag}")
 
     # Summary line
     parts = []
@@ -379,9 +393,10 @@ def _print_load_result(
     if total_removed:
         parts.append(f"{total_removed} removed")
     if parts:
-        print(f"\n  Summary: {', '.join(parts)}")
+        lines += ["", f"  Summary: {', '.join(parts)}"]
     elif not total_new and not total_removed:
-        print("\n  No changes")
+        lines += ["", "  No changes"]
+    return "\n".join(lines)
 
 
 def _load_auto(db, input_dir: str, source_name: str = ""):
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import base64
+import binascii
 import json
 import re
 from collections import defaultdict
@@ -26,7 +26,7 @@ class _HTMLTextExtractor(HTMLParser):
         return re.sub(r"\s+", " ", "".join(self._parts)).strip()
 
 
-def decode_presented_form(data_b64: str, content_type: str = "") -> str:
+def decode_presented_form(data_b64: str | bytes, content_type: str = "") -> str:
     """Decode a base64 presentedForm attachment and extract text.
 
     Handles text/html, text/plain, and application/xhtml+xml.
@@ -34,7 +34,9 @@ def decode_presented_form(data_b64: str, content_type: str = "") -> str:
     if not data_b64:
         return ""
     try:
-        raw = base64.b64decode(data_b64)
+        # a2b_base64 reads an ASCII str in place; base64.b64decode would
+        # first copy the whole (often multi-MB) payload via str.encode().
+        raw = binascii.a2b_base64(data_b64)
         text = raw.decode("utf-8", errors="replace")
     except Exception:
         return ""
@@ -9,11 +9,12 @@ ChartfoldDB wraps a SQLite database with:
 
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
 import sqlite3
 import time
-from dataclasses import asdict, fields
+from dataclasses import fields
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TypedDict
@@ -83,6 +84,13 @@ _UNIQUE_KEYS: dict[str, tuple[str, ...]] = {
     "genetic_variants": ("source", "gene", "dna_change", "test_name", "collection_date"),
 }
 
+# Most recent load_log row for a source (served by idx_load_log_source_ts).
+_LAST_LOAD_SQL = "SELECT * FROM load_log WHERE source = ? ORDER BY loaded_at DESC LIMIT 1"
+
+# Max ids bound per IN (...) query; stays under SQLite's 999-variable limit
+# on builds older than 3.32.
+_IN_BATCH_SIZE = 900
+
 
 class TableStats(TypedDict):
     """Per-table load statistics."""
@@ -157,7 +165,7 @@ def _content_hash(records: UnifiedRecords) -> str:
     h.update(records.source.encode())
 
     if records.patient is not None:
-        h.update(json.dumps(asdict(records.patient), sort_keys=True).encode())
+        h.update(json.dumps(_record_to_row(records.patient), sort_keys=True).encode())
 
     for attr, table, _dc_type in _TABLE_MAP:
         record_list = getattr(records, attr, [])
@@ -166,7 +174,7 @@ def _content_hash(records: UnifiedRecords) -> str:
         # Sort by natural key columns for deterministic ordering
         unique_cols = _UNIQUE_KEYS[table]
         natural_key_cols = [c for c in unique_cols if c != "source"]
-        rows = [asdict(r) for r in record_list]
+        rows = [_record_to_row(r) for r in record_list]
         rows.sort(key=lambda row: tuple(str(row.get(c, "")) for c in natural_key_cols))
         h.update(json.dumps(rows, sort_keys=True).encode())
 
@@ -193,20 +201,77 @@ def _get_schema_sql() -> str:
     return schema_path.read_text()
 
 
-def _columns_for(dc_type: type) -> list[str]:
-    """Get column names for a dataclass, excluding 'id' (auto-generated)."""
-    return [f.name for f in fields(dc_type)]
+@functools.cache
+def _columns_for(dc_type: type) -> tuple[str, ...]:
+    """Get column names for a dataclass, excluding 'id' (auto-generated).
+
+    Cached per type; a tuple so callers can't mutate the shared result.
+    """
+    return tuple(f.name for f in fields(dc_type))
 
 
 def _record_to_row(record) -> dict:
-    """Convert a dataclass record to a dict suitable for INSERT."""
-    return asdict(record)
+    """Convert a dataclass record to a dict suitable for INSERT.
+
+    Records only hold scalar fields, so a shallow getattr copy gives the
+    same result as dataclasses.asdict() without its recursive deepcopy.
+    """
+    return {name: getattr(record, name) for name in _columns_for(type(record))}
+
+
+def _tag_rows(fk_id: int, tags: list[str]) -> list[tuple[int, str]]:
+    """(fk_id, tag) rows for a record's tags: stripped, blanks and duplicates dropped."""
+    return [(fk_id, tag) for tag in dict.fromkeys(t.strip() for t in tags) if tag]
+
+
+def _note_search_sql(
+    query: str | None = None,
+    tag: str | None = None,
+    ref_table: str | None = None,
+    ref_id: int | None = None,
+) -> tuple[str, tuple]:
+    """Build the SQL and params search_notes_personal() runs."""
+    conditions: list[str] = []
+    params: list = []
+    joins = ""
+
+    if tag:
+        joins = " JOIN note_tags nt ON n.id = nt.note_id"
+        conditions.append("nt.tag = ?")
+        params.append(tag)
+
+    if query:
+        # LIKE already ignores ASCII case (SQLite's LOWER() is ASCII-only
+        # too), so wrapping each column in LOWER() only added per-row copies.
+        conditions.append("(n.title LIKE ? OR n.content LIKE ?)")
+        params.extend([f"%{query.lower()}%", f"%{query.lower()}%"])
+
+    if ref_table:
+        conditions.append("n.ref_table = ?")
+        params.append(ref_table)
+
+    if ref_id is not None:
+        conditions.append("n.ref_id = ?")
+        params.append(ref_id)
+
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    sql = (
+        f"SELECT DISTINCT n.id, n.title, n.created_at, n.updated_at, "
+        f"n.ref_table, n.ref_id, SUBSTR(n.content, 1, 300) as content_preview "
+        f"FROM notes n{joins}{where} ORDER BY n.updated_at DESC"
+    )
+    return sql, tuple(params)
 
 
+@functools.cache
 def _build_upsert_sql(
-    table: str, columns: list[str], unique_cols: tuple[str, ...]
+    table: str, columns: tuple[str, ...], unique_cols: tuple[str, ...]
 ) -> str:
-    """Build INSERT ... ON CONFLICT ... DO UPDATE SET SQL."""
+    """Build INSERT ... ON CONFLICT ... DO UPDATE SET SQL.
+
+    Cached so every load reuses the same SQL string per table, which also
+    keeps the connection's statement cache hitting.
+    """
     col_names = ", ".join(columns)
     placeholders = ", ".join("?" for _ in columns)
     conflict_cols = ", ".join(unique_cols)
@@ -264,9 +329,15 @@ class ChartfoldDB:
 
     def __init__(self, db_path: str = "chartfold.db"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # query() takes plain SQL strings; sqlite3 keeps an LRU of compiled
+        # statements per connection. The default of 128 is smaller than the
+        # set of distinct statements the analysis, notes and MCP layers issue.
+        self.conn = sqlite3.connect(db_path, cached_statements=512)
         self.conn.row_factory = sqlite3.Row
         self.conn.execute("PRAGMA journal_mode=WAL")
+        # Safe under WAL (a crash can only lose the last commits, never corrupt)
+        # and skips an fsync on every load_source transaction.
+        self.conn.execute("PRAGMA synchronous=NORMAL")
         self.conn.execute("PRAGMA foreign_keys=ON")
 
     def init_schema(self) -> None:
@@ -328,7 +399,7 @@ class ChartfoldDB:
                 unique_cols = _UNIQUE_KEYS["patients"]
                 existing_keys = _get_existing_keys(self.conn, "patients", source, unique_cols)
                 row = _record_to_row(records.patient)
-                cols = list(row.keys())
+                cols = tuple(row)
                 sql = _build_upsert_sql("patients", cols, unique_cols)
                 self.conn.execute(sql, list(row.values()))
 
@@ -393,7 +464,7 @@ class ChartfoldDB:
 
                 # Build UPSERT SQL from first record's columns
                 first_row = _record_to_row(record_list[0])
-                cols = list(first_row.keys())
+                cols = tuple(first_row)
                 sql = _build_upsert_sql(table, cols, unique_cols)
 
                 # Build value rows and collect natural keys in one pass
@@ -497,10 +568,7 @@ class ChartfoldDB:
 
     def last_load_counts(self, source: str) -> dict[str, int] | None:
         """Return record counts from the most recent load for a source."""
-        rows = self.query(
-            "SELECT * FROM load_log WHERE source = ? ORDER BY loaded_at DESC LIMIT 1",
-            (source,),
-        )
+        rows = self.query(_LAST_LOAD_SQL, (source,))
         if not rows:
             return None
         row = rows[0]
@@ -530,13 +598,11 @@ class ChartfoldDB:
     def _save_tags(self, table: str, fk_col: str, fk_id: int, tags: list[str]) -> None:
         """Replace all tags for a record: delete existing, insert new."""
         self.conn.execute(f"DELETE FROM {table} WHERE {fk_col}=?", (fk_id,))
-        for tag in tags:
-            clean = tag.strip()
-            if clean:
-                self.conn.execute(
-                    f"INSERT OR IGNORE INTO {table} ({fk_col}, tag) VALUES (?, ?)",
-                    (fk_id, clean),
-                )
+        self._insert_tags(table, fk_col, _tag_rows(fk_id, tags))
+
+    def _insert_tags(self, table: str, fk_col: str, rows: list[tuple[int, str]]) -> None:
+        """Insert (fk_id, tag) rows built by _tag_rows."""
+        self.conn.executemany(f"INSERT OR IGNORE INTO {table} ({fk_col}, tag) VALUES (?, ?)", rows)
 
     def _fetch_tags(self, table: str, fk_col: str, fk_id: int) -> list[str]:
         """Fetch sorted tags for a record."""
@@ -546,6 +612,22 @@ class ChartfoldDB:
         )
         return [r["tag"] for r in rows]
 
+    def _attach_tags(self, rows: list[dict], table: str, fk_col: str) -> None:
+        """Set sorted ``tags`` on each row, fetching tags in batched IN queries."""
+        tags: dict[int, list[str]] = {row["id"]: [] for row in rows}
+        ids = list(tags)
+        for start in range(0, len(ids), _IN_BATCH_SIZE):
+            batch = ids[start : start + _IN_BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            for fk_id, tag in self.conn.execute(
+                f"SELECT {fk_col}, tag FROM {table} WHERE {fk_col} IN ({placeholders}) "
+                f"ORDER BY tag",
+                batch,
+            ):
+                tags[fk_id].append(tag)
+        for row in rows:
+            row["tags"] = tags[row["id"]]
+
     # --- Personal notes CRUD ---
 
     def save_note(
@@ -583,6 +665,38 @@ class ChartfoldDB:
 
         return note_id
 
+    def save_notes(self, notes: list[dict]) -> list[int]:
+        """Create several personal notes in one transaction. Returns their IDs.
+
+        Each dict takes save_note's keyword arguments (title, content, and
+        optionally tags, ref_table, ref_id). All notes share one timestamp.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        note_ids: list[int] = []
+        tag_rows: list[tuple[int, str]] = []
+
+        with self.conn:
+            for note in notes:
+                cursor = self.conn.execute(
+                    "INSERT INTO notes (title, content, created_at, updated_at, ref_table, ref_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        note["title"],
+                        note["content"],
+                        now,
+                        now,
+                        note.get("ref_table"),
+                        note.get("ref_id"),
+                    ),
+                )
+                note_id = cursor.lastrowid or 0
+                note_ids.append(note_id)
+                tag_rows.extend(_tag_rows(note_id, note.get("tags") or []))
+
+            self._insert_tags("note_tags", "note_id", tag_rows)
+
+        return note_ids
+
     def get_note(self, note_id: int) -> dict | None:
         """Retrieve a note by ID, including its tags. Returns None if not found."""
         rows = self.query(
@@ -607,38 +721,10 @@ class ChartfoldDB:
 
         Returns notes ordered by updated_at DESC with a 300-char content preview.
         """
-        conditions: list[str] = []
-        params: list = []
-        joins = ""
-
-        if tag:
-            joins = " JOIN note_tags nt ON n.id = nt.note_id"
-            conditions.append("nt.tag = ?")
-            params.append(tag)
+        sql, params = _note_search_sql(query, tag, ref_table, ref_id)
+        rows = self.query(sql, params)
 
-        if query:
-            conditions.append("(LOWER(n.title) LIKE ? OR LOWER(n.content) LIKE ?)")
-            params.extend([f"%{query.lower()}%", f"%{query.lower()}%"])
-
-        if ref_table:
-            conditions.append("n.ref_table = ?")
-            params.append(ref_table)
-
-        if ref_id is not None:
-            conditions.append("n.ref_id = ?")
-            params.append(ref_id)
-
-        where = " WHERE " + " AND ".join(conditions) if conditions else ""
-
-        rows = self.query(
-            f"SELECT DISTINCT n.id, n.title, n.created_at, n.updated_at, "
-            f"n.ref_table, n.ref_id, SUBSTR(n.content, 1, 300) as content_preview "
-            f"FROM notes n{joins}{where} ORDER BY n.updated_at DESC",
-            tuple(params),
-        )
-
-        for row in rows:
-            row["tags"] = self._fetch_tags("note_tags", "note_id", row["id"])
+        self._attach_tags(rows, "note_tags", "note_id")
 
         return rows
 
@@ -725,8 +811,7 @@ class ChartfoldDB:
 
         if query:
             conditions.append(
-                "(LOWER(a.title) LIKE ? OR LOWER(a.content) LIKE ? "
-                "OR LOWER(a.frontmatter) LIKE ?)"
+                "(a.title LIKE ? OR a.content LIKE ? OR a.frontmatter LIKE ?)"
             )
             q = f"%{query.lower()}%"
             params.extend([q, q, q])
@@ -745,8 +830,7 @@ class ChartfoldDB:
             tuple(params),
         )
 
-        for row in rows:
-            row["tags"] = self._fetch_tags("analysis_tags", "analysis_id", row["id"])
+        self._attach_tags(rows, "analysis_tags", "analysis_id")
 
         return rows
 
@@ -8,9 +8,96 @@ by date proximity and specimen/procedure name similarity.
 from __future__ import annotations
 
 import re
+from datetime import date
 from difflib import SequenceMatcher
 
 
+def _compile(patterns: list[str]) -> tuple[re.Pattern[str], ...]:
+    return tuple(re.compile(p, re.IGNORECASE) for p in patterns)
+
+
+# Section start/end markers, searched case-insensitively.
+_DIAGNOSIS_START = _compile(
+    [
+        r"(?:Final\s+)?Diagnosis[:\s]*",
+        r"DIAGNOSIS[:\s]*",
+        r"Pathologic\s+Diagnosis[:\s]*",
+    ]
+)
+_DIAGNOSIS_END = _compile(
+    [
+        r"Gross\s+Description",
+        r"GROSS\s+DESCRIPTION",
+        r"Microscopic",
+        r"Comment[:\s]",
+        r"Clinical\s+Information",
+        r"By\s+this\s+signature",
+        r"Report\s+Electronically",
+        r"\b[a-z]{2,4}/\b",  # initials like "gp/" or "laha/"
+    ]
+)
+_GROSS_START = _compile(
+    [
+        r"Gross\s+Description[:\s]*",
+        r"GROSS\s+DESCRIPTION[:\s]*",
+    ]
+)
+_GROSS_END = _compile(
+    [
+        r"Microscopic\s+Description",
+        r"MICROSCOPIC",
+        r"Comment[:\s]",
+        r"By\s+this\s+signature",
+        r"PA\(s\):",
+        r"\b[a-z]{2,4}/\b",
+    ]
+)
+_MICRO_START = _compile(
+    [
+        r"Microscopic\s+Description[:\s]*",
+        r"MICROSCOPIC[:\s]*",
+    ]
+)
+_MICRO_END = _compile(
+    [
+        r"Comment[:\s]",
+        r"By\s+this\s+signature",
+        r"Addendum",
+        r"(?:Final\s+)?Diagnosis[:\s]",
+    ]
+)
+
+# Tried in order; the first match wins.
+_STAGING_RES = _compile(
+    [
+        r"(pT\d[a-z]?N\d[a-z]?(?:M\d)?)",
+        r"Stage\s+(I{1,3}V?[A-C]?\b)",
+        r"AJCC\s+Stage[:\s]*(.*?)(?:\.|$)",
+    ]
+)
+_MARGIN_RES = _compile(
+    [
+        r"(?:surgical\s+)?margins?[:\s]*(.*?)(?:\.|;|$)",
+        r"(?:Positive|Negative|Close)\s+(?:deep\s+)?(?:radial\s+)?margins?",
+        r"margins?\s+(?:are\s+)?(?:positive|negative|close|free|involved)",
+    ]
+)
+_LYMPH_NODE_RES = _compile(
+    [
+        r"(\d+)\s*/\s*(\d+)\s+(?:lymph\s+)?(?:node|LN)s?\s+(?:positive|involved|with\s+(?:metasta|tumor))",
+        r"(?:lymph\s+)?(?:node|LN)s?[:\s]*(\d+)\s*/\s*(\d+)\s+positive",
+        r"(?:positive|negative)\s+(?:lymph\s+)?(?:node|LN)s?",
+    ]
+)
+_SPECIMEN_RES = _compile(
+    [
+        r"Specimen[:\s]*\"?(.*?)\"?(?:\.|$)",
+        r"Received[:\s]*(.*?)(?:\.|$)",
+        r"Labeled[:\s]*\"(.*?)\"",
+    ]
+)
+
+
 def parse_pathology_sections(text: str) -> dict:
     """Parse a pathology report text into structured sections.
 
@@ -29,105 +116,30 @@ def parse_pathology_sections(text: str) -> dict:
     if not text:
         return result
 
-    # Diagnosis
-    diag = _extract_section(
-        text,
-        [
-            r"(?:Final\s+)?Diagnosis[:\s]*",
-            r"DIAGNOSIS[:\s]*",
-            r"Pathologic\s+Diagnosis[:\s]*",
-        ],
-        [
-            r"Gross\s+Description",
-            r"GROSS\s+DESCRIPTION",
-            r"Microscopic",
-            r"Comment[:\s]",
-            r"Clinical\s+Information",
-            r"By\s+this\s+signature",
-            r"Report\s+Electronically",
-            r"\b[a-z]{2,4}/\b",  # initials like "gp/" or "laha/"
-        ],
-    )
-    result["diagnosis"] = diag
-
-    # Gross Description
-    gross = _extract_section(
-        text,
-        [
-            r"Gross\s+Description[:\s]*",
-            r"GROSS\s+DESCRIPTION[:\s]*",
-        ],
-        [
-            r"Microscopic\s+Description",
-            r"MICROSCOPIC",
-            r"Comment[:\s]",
-            r"By\s+this\s+signature",
-            r"PA\(s\):",
-            r"\b[a-z]{2,4}/\b",
-        ],
-    )
-    result["gross_description"] = gross
-
-    # Microscopic Description
-    micro = _extract_section(
-        text,
-        [
-            r"Microscopic\s+Description[:\s]*",
-            r"MICROSCOPIC[:\s]*",
-        ],
-        [
-            r"Comment[:\s]",
-            r"By\s+this\s+signature",
-            r"Addendum",
-            r"(?:Final\s+)?Diagnosis[:\s]",
-        ],
-    )
-    result["microscopic_description"] = micro
-
-    # Staging
-    staging_patterns = [
-        r"(pT\d[a-z]?N\d[a-z]?(?:M\d)?)",
-        r"Stage\s+(I{1,3}V?[A-C]?\b)",
-        r"AJCC\s+Stage[:\s]*(.*?)(?:\.|$)",
-    ]
-    for pat in staging_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
+    result["diagnosis"] = _extract_section(text, _DIAGNOSIS_START, _DIAGNOSIS_END)
+    result["gross_description"] = _extract_section(text, _GROSS_START, _GROSS_END)
+    result["microscopic_description"] = _extract_section(text, _MICRO_START, _MICRO_END)
+
+    for pat in _STAGING_RES:
+        m = pat.search(text)
         if m:
             result["staging"] = m.group(1).strip()
             break
 
-    # Margins
-    margin_patterns = [
-        r"(?:surgical\s+)?margins?[:\s]*(.*?)(?:\.|;|$)",
-        r"(?:Positive|Negative|Close)\s+(?:deep\s+)?(?:radial\s+)?margins?",
-        r"margins?\s+(?:are\s+)?(?:positive|negative|close|free|involved)",
-    ]
-    for pat in margin_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
+    for pat in _MARGIN_RES:
+        m = pat.search(text)
         if m:
             result["margins"] = m.group(0).strip()
             break
 
-    # Lymph nodes
-    ln_patterns = [
-        r"(\d+)\s*/\s*(\d+)\s+(?:lymph\s+)?(?:node|LN)s?\s+(?:positive|involved|with\s+(?:metasta|tumor))",
-        r"(?:lymph\s+)?(?:node|LN)s?[:\s]*(\d+)\s*/\s*(\d+)\s+positive",
-        r"(?:positive|negative)\s+(?:lymph\s+)?(?:node|LN)s?",
-    ]
-    for pat in ln_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
+    for pat in _LYMPH_NODE_RES:
+        m = pat.search(text)
         if m:
             result["lymph_nodes"] = m.group(0).strip()
             break
 
-    # Specimen
-    spec_patterns = [
-        r"Specimen[:\s]*\"?(.*?)\"?(?:\.|$)",
-        r"Received[:\s]*(.*?)(?:\.|$)",
-        r"Labeled[:\s]*\"(.*?)\"",
-    ]
-    for pat in spec_patterns:
-        m = re.search(pat, text, re.IGNORECASE)
+    for pat in _SPECIMEN_RES:
+        m = pat.search(text)
         if m:
             result["specimen"] = m.group(1).strip()
             break
@@ -150,31 +162,44 @@ def link_pathology_to_procedures(
     Returns:
         List of (pathology_id, procedure_id) tuples.
     """
+    # One matcher per procedure name: SequenceMatcher indexes its second
+    # sequence up front, so only set_seq1 runs per pathology/procedure pair.
+    matchers = [
+        SequenceMatcher(None, b=name.lower()) if (name := proc.get("name", "")) else None
+        for proc in procedures
+    ]
+    proc_dates = [_parse_date(proc.get("procedure_date", "")) for proc in procedures]
+
     links = []
     for path in pathology_reports:
-        path_date = path.get("report_date", "")
-        if not path_date:
+        path_date = _parse_date(path.get("report_date", ""))
+        if path_date is None:
             continue
 
+        path_text = (path.get("specimen", "") + " " + path.get("diagnosis", "")).lower()
         best_proc = None
         best_score = 0.0
 
-        for proc in procedures:
-            proc_date = proc.get("procedure_date", "")
-            if not proc_date:
+        for proc, matcher, proc_date in zip(procedures, matchers, proc_dates, strict=True):
+            if proc_date is None:
                 continue
 
             # Check date proximity
-            days = _days_between(path_date, proc_date)
-            if days is None or days > max_days:
+            days = abs((path_date - proc_date).days)
+            if days > max_days:
                 continue
 
             # Score: closer dates score higher, name similarity adds bonus
             date_score = 1.0 - (days / max_days)
-            name_score = _name_similarity(
-                path.get("specimen", "") + " " + path.get("diagnosis", ""),
-                proc.get("name", ""),
-            )
+            if matcher is None:
+                name_score = 0.0
+            else:
+                matcher.set_seq1(path_text)
+                # quick_ratio() bounds ratio() from above; skip the full
+                # comparison when even a perfect bound can't beat the best.
+                if date_score * 0.6 + matcher.quick_ratio() * 0.4 <= best_score:
+                    continue
+                name_score = matcher.ratio()
             total_score = date_score * 0.6 + name_score * 0.4
 
             if total_score > best_score:
@@ -187,34 +212,43 @@ def link_pathology_to_procedures(
     return links
 
 
-def _extract_section(text: str, start_patterns: list[str], end_patterns: list[str]) -> str:
+def _extract_section(
+    text: str,
+    start_patterns: tuple[re.Pattern[str], ...],
+    end_patterns: tuple[re.Pattern[str], ...],
+) -> str:
     """Extract text between start and end patterns."""
     for start_pat in start_patterns:
-        m = re.search(start_pat, text, re.IGNORECASE)
+        m = start_pat.search(text)
         if m:
             rest = text[m.end() :]
             # Find the nearest end pattern
             earliest_end = len(rest)
             for end_pat in end_patterns:
-                em = re.search(end_pat, rest, re.IGNORECASE)
+                em = end_pat.search(rest)
                 if em and em.start() < earliest_end:
                     earliest_end = em.start()
             return rest[:earliest_end].strip()
     return ""
 
 
-def _days_between(date1: str, date2: str) -> int | None:
-    """Calculate absolute days between two ISO dates."""
+def _parse_date(value: str) -> date | None:
+    """Parse an ISO date, returning None if empty or malformed."""
     try:
-        from datetime import date
-
-        d1 = date.fromisoformat(date1)
-        d2 = date.fromisoformat(date2)
-        return abs((d1 - d2).days)
+        return date.fromisoformat(value)
     except (ValueError, TypeError):
         return None
 
 
+def _days_between(date1: str, date2: str) -> int | None:
+    """Calculate absolute days between two ISO dates."""
+    d1 = _parse_date(date1)
+    d2 = _parse_date(date2)
+    if d1 is None or d2 is None:
+        return None
+    return abs((d1 - d2).days)
+
+
 def _name_similarity(text1: str, text2: str) -> float:
     """Calculate name similarity using SequenceMatcher."""
     if not text1 or not text2:
@@ -9,7 +9,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 
 
-@dataclass
+@dataclass(slots=True)
 class PatientRecord:
     """Patient demographics."""
 
@@ -23,7 +23,7 @@ class PatientRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class DocumentRecord:
     """Source file inventory — one row per parsed document."""
 
@@ -37,7 +37,7 @@ class DocumentRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class EncounterRecord:
     """A clinical encounter (visit, admission, etc.)."""
 
@@ -53,7 +53,7 @@ class EncounterRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class LabResult:
     """A single lab test result."""
 
@@ -72,7 +72,7 @@ class LabResult:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class VitalRecord:
     """A single vital sign reading."""
 
@@ -86,7 +86,7 @@ class VitalRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class MedicationRecord:
     """A medication entry (active, historical, or discharge)."""
 
@@ -103,7 +103,7 @@ class MedicationRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class ConditionRecord:
     """A clinical condition / diagnosis."""
 
@@ -119,7 +119,7 @@ class ConditionRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcedureRecord:
     """A clinical procedure."""
 
@@ -136,7 +136,7 @@ class ProcedureRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class PathologyReport:
     """A pathology report, optionally linked to a procedure."""
 
@@ -155,7 +155,7 @@ class PathologyReport:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class ImagingReport:
     """An imaging study report."""
 
@@ -171,7 +171,7 @@ class ImagingReport:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class ClinicalNote:
     """A clinical note (progress note, H&P, discharge summary, etc.)."""
 
@@ -185,7 +185,7 @@ class ClinicalNote:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class ImmunizationRecord:
     """A vaccination record."""
 
@@ -200,7 +200,7 @@ class ImmunizationRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class AllergyRecord:
     """An allergy or adverse reaction."""
 
@@ -214,7 +214,7 @@ class AllergyRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class SocialHistoryRecord:
     """A social history entry (smoking, alcohol, occupation, etc.)."""
 
@@ -226,7 +226,7 @@ class SocialHistoryRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class FamilyHistoryRecord:
     """A family history entry."""
 
@@ -239,7 +239,7 @@ class FamilyHistoryRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class MentalStatusRecord:
     """A mental health screening result (PHQ-9, PHQ-2, GAD-7, etc.)."""
 
@@ -254,7 +254,7 @@ class MentalStatusRecord:
     metadata: str = ""  # JSON blob for unmapped source fields
 
 
-@dataclass
+@dataclass(slots=True)
 class GeneticVariant:
     """A genetic variant from genomic testing (e.g., Tempus XF panel)."""
 
@@ -278,7 +278,7 @@ class GeneticVariant:
     metadata: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceAsset:
     """A source file (PDF, image, etc.) not parsed but tracked for provenance."""
 
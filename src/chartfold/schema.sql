@@ -307,6 +307,7 @@ CREATE TABLE IF NOT EXISTS load_log (
     source_assets_count INTEGER DEFAULT 0,
     genetic_variants_count INTEGER DEFAULT 0
 );
+CREATE INDEX IF NOT EXISTS idx_load_log_source_ts ON load_log(source, loaded_at);
 
 -- Personal notes / analysis storage (created by Claude or user)
 CREATE TABLE IF NOT EXISTS notes (
@@ -327,6 +328,7 @@ CREATE TABLE IF NOT EXISTS note_tags (
 );
 
 CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at);
+CREATE INDEX IF NOT EXISTS idx_notes_updated ON notes(updated_at);
 CREATE INDEX IF NOT EXISTS idx_notes_ref ON notes(ref_table, ref_id);
 CREATE INDEX IF NOT EXISTS idx_note_tags_tag ON note_tags(tag);
 
@@ -15,17 +15,69 @@ Key HTML patterns:
 from __future__ import annotations
 
 import email
+import email.parser
 import email.policy
+import quopri
 import re
 from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
 
+from lxml import etree
 from lxml import html as lxml_html
 
-from chartfold.sources.mhtml_visit import _parse_display_date
-
-
-@dataclass
+from chartfold.sources.mhtml_visit import _HTML_PARSER, _parse_display_date
+
+_HEADER_PARSER = email.parser.BytesHeaderParser(policy=email.policy.default)
+
+# Compiled once; each call then runs straight in libxml2.
+_METADATA_DIVS = etree.XPath('.//div[contains(@class, "OrderMetadataLabelValue")]')
+_LAB_LINE_DIVS = etree.XPath('.//div[contains(@class, "labLine")]')
+_COMPONENT_HEADINGS = etree.XPath('.//h3[contains(@class, "componentHeading")]')
+_COMPONENT_VALUE_SPANS = etree.XPath(
+    './/span[contains(@class, "value") and not(contains(@class, "valueLabel"))]'
+)
+_ACCORDION_ITEMS = etree.XPath('.//div[contains(@class, "_AccordionItem")]')
+_TITLE_SPANS = etree.XPath('.//span[contains(@class, "title")]')
+_ASSESSMENT_SPANS = etree.XPath('.//span[contains(@class, "subtleStyle")]')
+_LABELLED_ITEMS = etree.XPath('.//div[contains(@class, "LabelledItem")]')
+
+_ASSESSMENT_PREFIX = "Assessment:"
+# Unit appears right after the trends link text, e.g. "...View trendsm/MB"
+_TMB_UNIT_RE = re.compile(r"View trends(\S+)")
+# "c.1369G>A Missense variant" -> ("c.1369G>A", "Missense variant")
+_DNA_CHANGE_RE = re.compile(r"(c\.\S+)\s+(.*)")
+
+# Lower-cased label -> ParsedTestResult field. Order matters for the
+# substring fallback in _match_label (first match wins).
+_METADATA_LABELS: dict[str, str] = {
+    "authorizing provider": "provider",
+    "ordering provider": "provider",
+    "collection date": "collection_date",
+    "result date": "result_date",
+    "specimen": "specimen",
+    "result status": "status",
+}
+_METADATA_DATE_FIELDS = frozenset({"collection_date", "result_date"})
+
+# Lower-cased LabelledItem label -> ParsedVariant field.
+_VARIANT_LABELS: dict[str, str] = {
+    "classification": "classification",
+    "type": "variant_type",
+    "variant source": "variant_origin",
+    "variant allele fraction": "vaf",
+    "dna change": "dna_change",
+    "transcript": "transcript",
+    "amino acid": "protein_change",
+    "analysis method": "analysis_method",
+}
+# "type" is too generic for substring matching (e.g. "Variant Type").
+_VARIANT_EXACT_ONLY = frozenset({"type"})
+# Fields already parsed from the accordion header; labelled items only fill gaps.
+_VARIANT_HEADER_FIELDS = frozenset({"variant_type", "dna_change", "protein_change"})
+
+
+@dataclass(slots=True)
 class ParsedVariant:
     """A single genetic variant extracted from the HTML."""
 
@@ -41,7 +93,7 @@ class ParsedVariant:
     analysis_method: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedTestResult:
     """Parsed output from a MyChart test-result MHTML page."""
 
@@ -78,15 +130,16 @@ def parse_test_result_mhtml(file_path: str) -> ParsedTestResult:
     if not path.is_file():
         raise FileNotFoundError(f"MHTML file not found: {file_path}")
 
-    with open(path, "rb") as f:
-        msg = email.message_from_binary_file(f, policy=email.policy.default)
-
-    html_body = ""
-    for part in msg.walk():
-        if part.get_content_type() == "text/html" and not html_body:
-            payload = part.get_payload(decode=True)
-            if payload:
-                html_body = payload.decode("utf-8", errors="replace")
+    data = path.read_bytes()
+    html_body = _leading_html_part(data)
+    if html_body is None:
+        html_body = ""
+        msg = email.message_from_bytes(data, policy=email.policy.default)
+        for part in msg.walk():
+            if part.get_content_type() == "text/html" and not html_body:
+                payload = part.get_payload(decode=True)
+                if payload:
+                    html_body = payload.decode("utf-8", errors="replace")
 
     result = ParsedTestResult()
     if html_body:
@@ -94,10 +147,65 @@ def parse_test_result_mhtml(file_path: str) -> ParsedTestResult:
     return result
 
 
+def _leading_html_part(data: bytes) -> str | None:
+    """Decode the first MIME part directly when it is the page HTML.
+
+    Saved pages put the HTML first, so there is no need to parse and decode
+    every image part just to find it. Returns None for anything else
+    (no boundary, first part not HTML, unknown encoding, empty body) so the
+    caller can fall back to the email module.
+    """
+    split = _split_headers(data)
+    if split is None:
+        return None
+    header_bytes, _ = split
+    headers = _HEADER_PARSER.parsebytes(header_bytes)
+    boundary = headers.get_boundary()
+    if not boundary:
+        return None
+
+    delimiter = b"--" + boundary.encode("ascii", errors="replace")
+    start = data.find(delimiter, len(header_bytes))
+    if start < 0:
+        return None
+    start = data.find(b"\n", start) + 1
+    end = data.find(b"\n" + delimiter, start)
+    if start <= 0 or end < 0:
+        return None
+
+    split = _split_headers(data[start:end])
+    if split is None:
+        return None
+    part_header_bytes, body = split
+    part_headers = _HEADER_PARSER.parsebytes(part_header_bytes)
+    if part_headers.get_content_type() != "text/html":
+        return None
+    encoding = str(part_headers.get("Content-Transfer-Encoding", "7bit")).strip().lower()
+    body = body.removesuffix(b"\r")
+    if encoding == "quoted-printable":
+        body = quopri.decodestring(body)
+    elif encoding not in ("7bit", "8bit", "binary"):
+        return None
+    if not body:
+        return None
+    return body.decode("utf-8", errors="replace")
+
+
+def _split_headers(block: bytes) -> tuple[bytes, bytes] | None:
+    """Split a MIME block at the first blank line (CRLF or LF)."""
+    crlf = block.find(b"\r\n\r\n")
+    lf = block.find(b"\n\n")
+    if crlf >= 0 and (lf < 0 or crlf < lf):
+        return block[:crlf], block[crlf + 4 :]
+    if lf >= 0:
+        return block[:lf], block[lf + 2 :]
+    return None
+
+
 def _extract_from_html(html_body: str, result: ParsedTestResult) -> None:
     """Extract test result data from the HTML body."""
     try:
-        doc = lxml_html.fromstring(html_body)
+        doc = lxml_html.fromstring(html_body, parser=_HTML_PARSER)
     except Exception:
         return
 
@@ -121,29 +229,23 @@ def _extract_test_name(doc, result: ParsedTestResult) -> None:
 
 def _extract_metadata(doc, result: ParsedTestResult) -> None:
     """Extract metadata from OrderMetadataLabelValue divs."""
-    for div in doc.xpath('.//div[contains(@class, "OrderMetadataLabelValue")]'):
-        spans = div.xpath(".//span")
-        if len(spans) < 2:
+    for div in _METADATA_DIVS(doc):
+        pair = _label_value(div)
+        if pair is None:
+            continue
+        label, value = pair
+
+        field_name = _match_label(label.lower(), _METADATA_LABELS)
+        if field_name is None:
             continue
-        label = spans[0].text_content().strip().rstrip(":")
-        value = spans[1].text_content().strip()
-
-        label_lower = label.lower()
-        if "authorizing provider" in label_lower or "ordering provider" in label_lower:
-            result.provider = value
-        elif "collection date" in label_lower:
-            result.collection_date = _parse_display_date(value)
-        elif "result date" in label_lower:
-            result.result_date = _parse_display_date(value)
-        elif "specimen" in label_lower:
-            result.specimen = value
-        elif "result status" in label_lower:
-            result.status = value
+        if field_name in _METADATA_DATE_FIELDS:
+            value = _parse_display_date(value)
+        setattr(result, field_name, value)
 
 
 def _extract_lab_name(doc, result: ParsedTestResult) -> None:
     """Extract resulting lab name from labLine divs."""
-    lab_lines = doc.xpath('.//div[contains(@class, "labLine")]')
+    lab_lines = _LAB_LINE_DIVS(doc)
     # Pattern: "Resulting lab:" label followed by emphasis line with lab name
     for i, div in enumerate(lab_lines):
         text = div.text_content().strip()
@@ -158,9 +260,10 @@ def _extract_lab_name(doc, result: ParsedTestResult) -> None:
 
 def _extract_components(doc, result: ParsedTestResult) -> None:
     """Extract component values (TMB, MSI, interpretation, etc.)."""
-    # Build a map of component name -> value by finding ComponentCardHeader + value pairs
-    components: dict[str, str] = {}
-    for h3 in doc.xpath('.//h3[contains(@class, "componentHeading")]'):
+    # Build a map of component name -> (value, heading) by finding
+    # ComponentCardHeader + value pairs
+    components: dict[str, tuple[str, object]] = {}
+    for h3 in _COMPONENT_HEADINGS(doc):
         name = h3.text_content().strip()
         # Navigate: h3 -> parent -> grandparent -> great-grandparent has
         # sibling NonNumericResultComponent
@@ -169,17 +272,13 @@ def _extract_components(doc, result: ParsedTestResult) -> None:
             # Find NonNumericResultComponent sibling
             for child in ggp:
                 if "NonNumericResultComponent" in child.get("class", ""):
-                    xpath = (
-                        './/span[contains(@class, "value")'
-                        ' and not(contains(@class, "valueLabel"))]'
-                    )
-                    value_spans = child.xpath(xpath)
+                    value_spans = _COMPONENT_VALUE_SPANS(child)
                     if value_spans:
-                        components[name] = value_spans[0].text_content().strip()
+                        components[name] = (value_spans[0].text_content().strip(), h3)
                     break
 
     # Map component names to result fields
-    for name, value in components.items():
+    for name, (value, h3) in components.items():
         name_lower = name.lower()
         if "reason" in name_lower:
             result.reason = value
@@ -189,20 +288,12 @@ def _extract_components(doc, result: ParsedTestResult) -> None:
             result.overall_interpretation = value
         elif "tumor mutational burden" in name_lower:
             result.tmb_value = value
-            # Unit is in the ComponentCardHeader
-            gp_candidates = doc.xpath(
-                './/h3[contains(@class, "componentHeading")]'
-            )
-            for h3 in gp_candidates:
-                if "tumor mutational burden" in h3.text_content().strip().lower():
-                    header_parent = _ancestor(h3, 2)
-                    if header_parent is not None:
-                        header_text = header_parent.text_content()
-                        # Unit appears after the heading text, e.g., "...View trendsm/MB"
-                        match = re.search(r"View trends(\S+)", header_text)
-                        if match:
-                            result.tmb_unit = match.group(1).strip()
-                    break
+            # Unit is in the ComponentCardHeader next to the heading
+            header_parent = _ancestor(h3, 2)
+            if header_parent is not None:
+                match = _TMB_UNIT_RE.search(header_parent.text_content())
+                if match:
+                    result.tmb_unit = match.group(1).strip()
         elif "microsatellite instability" in name_lower:
             result.msi_status = value
         elif "treatment implications" in name_lower:
@@ -217,58 +308,74 @@ def _extract_components(doc, result: ParsedTestResult) -> None:
 
 def _extract_variants(doc, result: ParsedTestResult) -> None:
     """Extract genetic variants from accordion items."""
-    for item in doc.xpath('.//div[contains(@class, "_AccordionItem")]'):
+    for item in _ACCORDION_ITEMS(doc):
         variant = ParsedVariant()
 
         # 1. Parse gene name, protein/dna change, type from accordion header
         # Format: "GENE - p.X123Y - c.456A>G Type\nAssessment: Status"
-        title_span = item.xpath('.//span[contains(@class, "title")]')
+        title_span = _TITLE_SPANS(item)
         if title_span:
             _parse_variant_header(title_span[0].text_content().strip(), variant)
 
-        assessment_span = item.xpath('.//span[contains(@class, "subtleStyle")]')
+        assessment_span = _ASSESSMENT_SPANS(item)
         if assessment_span:
             text = assessment_span[0].text_content().strip()
-            match = re.match(r"Assessment:\s*(.+)", text)
-            if match:
-                variant.assessment = match.group(1).strip()
+            if text.startswith(_ASSESSMENT_PREFIX):
+                rest = text[len(_ASSESSMENT_PREFIX) :].lstrip()
+                variant.assessment = rest.partition("\n")[0].strip()
 
         # 2. Parse labelled items from variant details
-        for label_div in item.xpath('.//div[contains(@class, "LabelledItem")]'):
-            spans = label_div.xpath(".//span")
-            if len(spans) < 2:
+        for label_div in _LABELLED_ITEMS(item):
+            pair = _label_value(label_div)
+            if pair is None:
                 continue
-            label = spans[0].text_content().strip().rstrip(":")
-            value = spans[1].text_content().strip()
-
-            label_lower = label.lower()
-            if "classification" in label_lower:
-                variant.classification = value
-            elif label_lower == "type":
-                # Don't overwrite variant_type from header if this is "Simple"
-                if not variant.variant_type:
-                    variant.variant_type = value
-            elif "variant source" in label_lower:
-                variant.variant_origin = value
-            elif "variant allele fraction" in label_lower:
-                variant.vaf = value
-            elif "dna change" in label_lower:
-                # Prefer header-parsed dna_change, but use this as fallback
-                if not variant.dna_change:
-                    variant.dna_change = value
-            elif "transcript" in label_lower:
+            label, value = pair
+
+            field_name = _match_label(label.lower(), _VARIANT_LABELS, _VARIANT_EXACT_ONLY)
+            if field_name is None:
+                continue
+            # Prefer header-parsed values (e.g. don't overwrite the type with "Simple")
+            if field_name in _VARIANT_HEADER_FIELDS and getattr(variant, field_name):
+                continue
+            if field_name == "transcript":
                 # "NM_003786 (RefSeq-T)" -> "NM_003786"
-                variant.transcript = value.split()[0] if value else ""
-            elif "amino acid" in label_lower:
-                if not variant.protein_change:
-                    variant.protein_change = value
-            elif "analysis method" in label_lower:
-                variant.analysis_method = value
+                value = value.split()[0] if value else ""
+            setattr(variant, field_name, value)
 
         if variant.gene:
             result.variants.append(variant)
 
 
+def _label_value(container) -> tuple[str, str] | None:
+    """Return (label, value) text from the first two spans in a container.
+
+    Walks descendants lazily and stops at the second span instead of
+    collecting every span.
+    """
+    spans = list(islice(container.iter("span"), 2))
+    if len(spans) < 2:
+        return None
+    return spans[0].text_content().strip().rstrip(":"), spans[1].text_content().strip()
+
+
+def _match_label(
+    label: str, fields: dict[str, str], exact_only: frozenset[str] = frozenset()
+) -> str | None:
+    """Map a lower-cased label to a field name.
+
+    Exact labels are a single dict lookup. Otherwise the first key contained
+    in the label wins, so variants like "Specimens" or "Amino Acid Change"
+    still resolve.
+    """
+    field_name = fields.get(label)
+    if field_name is not None:
+        return field_name
+    for needle, candidate in fields.items():
+        if needle not in exact_only and needle in label:
+            return candidate
+    return None
+
+
 def _parse_variant_header(header: str, variant: ParsedVariant) -> None:
     """Parse variant header like 'ABCC3 - p.A457T - c.1369G>A Missense variant'.
 
@@ -288,7 +395,7 @@ def _parse_variant_header(header: str, variant: ParsedVariant) -> None:
         # Last part: "c.1369G>A Missense variant"
         last = parts[2]
         # Split at first space after the dna_change notation
-        match = re.match(r"(c\.\S+)\s+(.*)", last)
+        match = _DNA_CHANGE_RE.match(last) if last.startswith("c.") else None
         if match:
             variant.dna_change = match.group(1)
             variant.variant_type = match.group(2)
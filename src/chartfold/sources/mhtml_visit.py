@@ -15,10 +15,12 @@ from __future__ import annotations
 
 import email
 import email.policy
+import functools
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from lxml import etree
 from lxml import html as lxml_html
 
 
@@ -47,6 +49,16 @@ class ParsedVisit:
     images: dict[str, bytes] = field(default_factory=dict)  # UUID -> raw bytes
 
 
+# Saved MyChart pages carry many comments; none are used, so don't build them.
+_HTML_PARSER = lxml_html.HTMLParser(remove_comments=True, remove_pis=True)
+_SUBTITLE_DIVS = etree.XPath('.//div[contains(@class, "subtitle")]')
+_PARAGRAPH_DIVS = etree.XPath(".//div[@data-paragraph]")
+
+# "Office Visit - Feb 05, 2026" -> ("Office Visit", "Feb 05, 2026")
+_VISIT_HEADER_RE = re.compile(r"(.+?)\s*-\s*(\w+ \d{1,2},\s*\d{4})")
+# "with Benjamin Tan, MD at WashU Medicine Oncology"
+_PROVIDER_FACILITY_RE = re.compile(r"with\s+(.+?)\s+at\s+(.+)")
+
 # Pattern: modality name followed by M/D/YYYY or M/DD/YYYY date
 _STUDY_HEADER_RE = re.compile(
     r"^((?:MRI|CT|PET|US|XR|MRA|CTA|PET/CT|PET/FDG|MRI/CT|Ultrasound|X-ray)"
@@ -59,6 +71,17 @@ _STUDY_HEADER_BROAD_RE = re.compile(
     r"^(.+?)\s+(\d{1,2}/\d{1,2}/\d{4})$"
 )
 
+# MyChart/Image/Load?fileName=<UUID>
+_UUID_URL_RE = re.compile(r"fileName=([a-f0-9-]{36})")
+
+# "Feb 05, 2026" / "January 15, 2026 1:30 PM"
+_DISPLAY_DATE_RE = re.compile(r"(\w+)\s+(\d{1,2}),?\s*(\d{4})")
+_MONTHS = {
+    "jan": "01", "feb": "02", "mar": "03", "apr": "04",
+    "may": "05", "jun": "06", "jul": "07", "aug": "08",
+    "sep": "09", "oct": "10", "nov": "11", "dec": "12",
+}
+
 
 def _normalize_date(date_str: str) -> str:
     """Convert M/D/YYYY to YYYY-MM-DD."""
@@ -71,7 +94,11 @@ def _normalize_date(date_str: str) -> str:
 
 def _extract_uuid_from_url(url: str) -> str:
     """Extract the UUID from a MyChart Image/Load URL."""
-    match = re.search(r"fileName=([a-f0-9-]{36})", url)
+    # Most src/Content-Location values aren't image URLs; skip the regex for those
+    idx = url.find("fileName=")
+    if idx < 0:
+        return ""
+    match = _UUID_URL_RE.search(url, idx)
     return match.group(1) if match else ""
 
 
@@ -120,7 +147,7 @@ def parse_mhtml(file_path: str) -> ParsedVisit:
 def _extract_from_html(html_body: str, result: ParsedVisit) -> None:
     """Extract visit metadata and note content from the HTML body."""
     try:
-        doc = lxml_html.fromstring(html_body)
+        doc = lxml_html.fromstring(html_body, parser=_HTML_PARSER)
     except Exception:
         return
 
@@ -128,7 +155,7 @@ def _extract_from_html(html_body: str, result: ParsedVisit) -> None:
     for h1 in doc.iter("h1"):
         text = (h1.text_content() or "").strip()
         # Pattern: "Office Visit - Feb 05, 2026"
-        match = re.match(r"(.+?)\s*-\s*(\w+ \d{1,2},\s*\d{4})", text)
+        match = _VISIT_HEADER_RE.match(text)
         if match:
             result.visit_type = match.group(1).strip()
             # Parse "Feb 05, 2026" -> "2026-02-05"
@@ -137,12 +164,12 @@ def _extract_from_html(html_body: str, result: ParsedVisit) -> None:
 
     # 2. Provider/facility: <div class="subtitle">with Benjamin Tan, MD at WashU...</div>
     # Use XPath: divs whose class contains "subtitle"
-    subtitle_divs = doc.xpath('.//div[contains(@class, "subtitle")]')
+    subtitle_divs = _SUBTITLE_DIVS(doc)
     if not subtitle_divs:
         subtitle_divs = list(doc.iter("div"))
     for div in subtitle_divs:
         text = (div.text_content() or "").strip()
-        match = re.match(r"with\s+(.+?)\s+at\s+(.+)", text)
+        match = _PROVIDER_FACILITY_RE.match(text)
         if match:
             result.provider = match.group(1).strip()
             result.facility = match.group(2).strip()
@@ -152,7 +179,7 @@ def _extract_from_html(html_body: str, result: ParsedVisit) -> None:
     paragraphs: list[str] = []
     image_positions: list[tuple[int, str]] = []  # (paragraph_idx, uuid)
 
-    for div in doc.xpath('.//div[@data-paragraph]'):
+    for div in _PARAGRAPH_DIVS(doc):
         para_idx = int(div.get("data-paragraph", "0"))
         text = (div.text_content() or "").strip()
 
@@ -223,16 +250,15 @@ def _looks_like_study_name(text: str) -> bool:
     return first_word in modality_words or "/" in text.split()[0]
 
 
+@functools.lru_cache(maxsize=512)
 def _parse_display_date(date_str: str) -> str:
-    """Parse 'Feb 05, 2026' or 'January 15, 2026' to ISO YYYY-MM-DD."""
-    months = {
-        "jan": "01", "feb": "02", "mar": "03", "apr": "04",
-        "may": "05", "jun": "06", "jul": "07", "aug": "08",
-        "sep": "09", "oct": "10", "nov": "11", "dec": "12",
-    }
-    match = re.match(r"(\w+)\s+(\d{1,2}),?\s*(\d{4})", date_str.strip())
+    """Parse 'Feb 05, 2026' or 'January 15, 2026' to ISO YYYY-MM-DD.
+
+    Cached: a page repeats the same few date strings across fields.
+    """
+    match = _DISPLAY_DATE_RE.match(date_str.strip())
     if match:
         month_name, day, year = match.groups()
-        month_num = months.get(month_name[:3].lower(), "01")
+        month_num = _MONTHS.get(month_name[:3].lower(), "01")
         return f"{year}-{month_num}-{int(day):02d}"
     return ""
@@ -1,7 +1,14 @@
 """Shared test fixtures for chartfold tests."""
 
+import dataclasses
+import functools
+
 import pytest
+from lxml import etree
 
+from chartfold.adapters.athena_adapter import athena_to_unified
+from chartfold.adapters.epic_adapter import epic_to_unified
+from chartfold.adapters.meditech_adapter import meditech_to_unified
 from chartfold.db import ChartfoldDB
 from chartfold.models import (
     ConditionRecord,
@@ -17,6 +24,17 @@ from chartfold.models import (
 )
 
 
+@pytest.fixture(scope="session")
+def parse_xml():
+    """Parse read-only XML fixtures with one shared, tuned lxml parser.
+
+    Blank text nodes and ID tables are never needed by the section extractors,
+    so the parser skips them; entities are never resolved.
+    """
+    parser = etree.XMLParser(remove_blank_text=True, collect_ids=False, resolve_entities=False)
+    return functools.partial(etree.fromstring, parser=parser)
+
+
 @pytest.fixture
 def tmp_db(tmp_path):
     """Create a temporary SQLite database with schema initialized."""
@@ -27,8 +45,25 @@ def tmp_db(tmp_path):
     db.close()
 
 
+@pytest.fixture(scope="session")
+def schema_template():
+    """In-memory DB with the schema built once, copied into each memory_db."""
+    db = ChartfoldDB(":memory:")
+    db.init_schema()
+    yield db
+    db.close()
+
+
 @pytest.fixture
-def sample_unified_records():
+def memory_db(schema_template):
+    """Fresh in-memory database per test, for tests that don't need a file."""
+    db = ChartfoldDB(":memory:")
+    schema_template.conn.backup(db.conn)
+    yield db
+    db.close()
+
+
+def _build_sample_unified_records() -> UnifiedRecords:
     """Create a minimal UnifiedRecords for testing."""
     return UnifiedRecords(
         source="test_source",
@@ -101,6 +136,24 @@ def sample_unified_records():
     )
 
 
+@pytest.fixture(scope="session")
+def _sample_unified_base():
+    """The sample UnifiedRecords, built once. Never mutate; use sample_unified_records."""
+    return _build_sample_unified_records()
+
+
+@pytest.fixture
+def sample_unified_records(_sample_unified_base):
+    """Per-test view of the sample UnifiedRecords.
+
+    Shares the record instances and lists with the session base, except
+    lab_results, which tests reassign or trim.
+    """
+    return dataclasses.replace(
+        _sample_unified_base, lab_results=list(_sample_unified_base.lab_results)
+    )
+
+
 @pytest.fixture
 def loaded_db(tmp_db, sample_unified_records):
     """A database with sample data loaded."""
@@ -108,8 +161,7 @@ def loaded_db(tmp_db, sample_unified_records):
     return tmp_db
 
 
-@pytest.fixture
-def sample_epic_data():
+def _sample_epic_data() -> dict:
     """Minimal Epic extraction output dict."""
     return {
         "source": "Epic",
@@ -290,8 +342,7 @@ def sample_epic_data():
     }
 
 
-@pytest.fixture
-def sample_meditech_data():
+def _sample_meditech_data() -> dict:
     """Minimal MEDITECH extraction output dict."""
     return {
         "source": "MEDITECH",
@@ -499,8 +550,7 @@ def sample_meditech_data():
     }
 
 
-@pytest.fixture
-def sample_athena_data():
+def _sample_athena_data() -> dict:
     """Minimal athenahealth extraction output dict."""
     return {
         "patient": {
@@ -645,7 +695,43 @@ def sample_athena_data():
 
 
 @pytest.fixture
-def surgical_db(tmp_db):
+def sample_epic_data():
+    """Minimal Epic extraction output dict (fresh per test; tests may mutate it)."""
+    return _sample_epic_data()
+
+
+@pytest.fixture
+def sample_meditech_data():
+    """Minimal MEDITECH extraction output dict (fresh per test; tests may mutate it)."""
+    return _sample_meditech_data()
+
+
+@pytest.fixture
+def sample_athena_data():
+    """Minimal athenahealth extraction output dict (fresh per test; tests may mutate it)."""
+    return _sample_athena_data()
+
+
+@pytest.fixture(scope="session")
+def epic_unified():
+    """epic_to_unified() of the sample Epic data, built once. Treat as read-only."""
+    return epic_to_unified(_sample_epic_data())
+
+
+@pytest.fixture(scope="session")
+def meditech_unified():
+    """meditech_to_unified() of the sample MEDITECH data, built once. Treat as read-only."""
+    return meditech_to_unified(_sample_meditech_data())
+
+
+@pytest.fixture(scope="session")
+def athena_unified():
+    """athena_to_unified() of the sample athenahealth data, built once. Treat as read-only."""
+    return athena_to_unified(_sample_athena_data())
+
+
+@pytest.fixture
+def surgical_db(memory_db):
     """A database with procedures, pathology, and imaging for surgical timeline testing."""
     records = UnifiedRecords(
         source="test_surgical",
@@ -702,5 +788,5 @@ def surgical_db(tmp_db):
             ),
         ],
     )
-    tmp_db.load_source(records)
-    return tmp_db
+    memory_db.load_source(records)
+    return memory_db
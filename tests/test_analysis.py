@@ -14,7 +14,6 @@ from chartfold.analysis.medications import get_active_medications, get_medicatio
 from chartfold.analysis.visit_diff import visit_diff
 from chartfold.analysis.surgical_timeline import build_surgical_timeline
 from chartfold.analysis.visit_prep import generate_visit_prep
-from chartfold.db import ChartfoldDB
 from chartfold.models import (
     ClinicalNote,
     ConditionRecord,
@@ -29,11 +28,8 @@ from chartfold.models import (
 
 
 @pytest.fixture
-def analysis_db(tmp_path):
+def analysis_db(memory_db):
     """Database with analysis-suitable test data."""
-    db = ChartfoldDB(str(tmp_path / "analysis.db"))
-    db.init_schema()
-
     records = UnifiedRecords(
         source="test",
         lab_results=[
@@ -116,9 +112,8 @@ def analysis_db(tmp_path):
             ),
         ],
     )
-    db.load_source(records)
-    yield db
-    db.close()
+    memory_db.load_source(records)
+    return memory_db
 
 
 class TestLabTrends:
@@ -150,11 +145,8 @@ class TestLabTrends:
 
 
 @pytest.fixture
-def multi_source_db(tmp_path):
+def multi_source_db(memory_db):
     """Database with lab data from multiple sources for cross-source testing."""
-    db = ChartfoldDB(str(tmp_path / "multi.db"))
-    db.init_schema()
-
     epic_records = UnifiedRecords(
         source="epic_anderson",
         lab_results=[
@@ -214,18 +206,14 @@ def multi_source_db(tmp_path):
             ),
         ],
     )
-    db.load_source(epic_records)
-    db.load_source(meditech_records)
-    yield db
-    db.close()
+    memory_db.load_source(epic_records)
+    memory_db.load_source(meditech_records)
+    return memory_db
 
 
 @pytest.fixture
-def synonym_db(tmp_path):
+def synonym_db(memory_db):
     """Database with different test names for the same test across sources."""
-    db = ChartfoldDB(str(tmp_path / "synonym.db"))
-    db.init_schema()
-
     epic_records = UnifiedRecords(
         source="epic_anderson",
         lab_results=[
@@ -287,10 +275,9 @@ def synonym_db(tmp_path):
             ),
         ],
     )
-    db.load_source(epic_records)
-    db.load_source(meditech_records)
-    yield db
-    db.close()
+    memory_db.load_source(epic_records)
+    memory_db.load_source(meditech_records)
+    return memory_db
 
 
 class TestLabTrendMultiName:
@@ -420,11 +407,8 @@ class TestAvailableTests:
 
 
 @pytest.fixture
-def visit_diff_db(tmp_path):
+def visit_diff_db(memory_db):
     """Database with varied data for testing visit_diff across date ranges."""
-    db = ChartfoldDB(str(tmp_path / "diff.db"))
-    db.init_schema()
-
     records = UnifiedRecords(
         source="test",
         lab_results=[
@@ -528,9 +512,8 @@ def visit_diff_db(tmp_path):
             ),
         ],
     )
-    db.load_source(records)
-    yield db
-    db.close()
+    memory_db.load_source(records)
+    return memory_db
 
 
 class TestVisitDiff:
@@ -660,8 +643,8 @@ class TestSurgicalTimeline:
         assert path1 is not None
         assert "adenocarcinoma" in path1["diagnosis"].lower()
 
-    def test_empty_db(self, tmp_db):
-        timeline = build_surgical_timeline(tmp_db)
+    def test_empty_db(self, memory_db):
+        timeline = build_surgical_timeline(memory_db)
         assert timeline == []
 
     def test_imaging_has_timing(self, surgical_db):
@@ -744,7 +727,7 @@ class TestSurgicalTimelineSortOrder:
         assert timeline[0]["procedure"]["name"] == "Liver resection"
         assert timeline[1]["procedure"]["name"] == "Right hemicolectomy"
 
-    def test_empty_dates_sort_last(self, tmp_db):
+    def test_empty_dates_sort_last(self, memory_db):
         """Procedures with empty dates should sort after dated procedures."""
         records = UnifiedRecords(
             source="test_sort",
@@ -766,8 +749,8 @@ class TestSurgicalTimelineSortOrder:
                 ),
             ],
         )
-        tmp_db.load_source(records)
-        timeline = build_surgical_timeline(tmp_db)
+        memory_db.load_source(records)
+        timeline = build_surgical_timeline(memory_db)
         assert len(timeline) == 3
         # Dated procedures first (most recent to oldest), undated last
         assert timeline[0]["procedure"]["name"] == "Dated procedure"
@@ -784,7 +767,7 @@ class TestSurgicalTimelineSortOrder:
 class TestMetadataStorage:
     """Metadata JSON column should be stored and retrieved for all clinical tables."""
 
-    def test_procedure_metadata_stored(self, tmp_db):
+    def test_procedure_metadata_stored(self, memory_db):
         """Procedure metadata should be stored and queryable."""
         import json
 
@@ -799,14 +782,14 @@ class TestMetadataStorage:
                 ),
             ],
         )
-        tmp_db.load_source(records)
-        rows = tmp_db.query("SELECT name, metadata FROM procedures WHERE source = 'test_meta'")
+        memory_db.load_source(records)
+        rows = memory_db.query("SELECT name, metadata FROM procedures WHERE source = 'test_meta'")
         assert len(rows) == 1
         meta = json.loads(rows[0]["metadata"])
         assert meta["encounter_date"] == "2025-01-15"
         assert meta["code_system"] == "2.16.840.1.113883.6.96"
 
-    def test_lab_result_metadata_stored(self, tmp_db):
+    def test_lab_result_metadata_stored(self, memory_db):
         """Lab result metadata should be stored and queryable."""
         import json
 
@@ -822,13 +805,13 @@ class TestMetadataStorage:
                 ),
             ],
         )
-        tmp_db.load_source(records)
-        rows = tmp_db.query("SELECT metadata FROM lab_results WHERE source = 'test_meta'")
+        memory_db.load_source(records)
+        rows = memory_db.query("SELECT metadata FROM lab_results WHERE source = 'test_meta'")
         assert len(rows) == 1
         meta = json.loads(rows[0]["metadata"])
         assert meta["method"] == "immunoassay"
 
-    def test_metadata_defaults_to_empty(self, tmp_db):
+    def test_metadata_defaults_to_empty(self, memory_db):
         """Records without metadata should have empty string metadata."""
         records = UnifiedRecords(
             source="test_meta",
@@ -840,12 +823,12 @@ class TestMetadataStorage:
                 ),
             ],
         )
-        tmp_db.load_source(records)
-        rows = tmp_db.query("SELECT metadata FROM procedures WHERE source = 'test_meta'")
+        memory_db.load_source(records)
+        rows = memory_db.query("SELECT metadata FROM procedures WHERE source = 'test_meta'")
         assert len(rows) == 1
         assert rows[0]["metadata"] == ""
 
-    def test_metadata_queryable_with_json_extract(self, tmp_db):
+    def test_metadata_queryable_with_json_extract(self, memory_db):
         """Metadata should be queryable with SQLite json_extract()."""
         import json
 
@@ -860,8 +843,8 @@ class TestMetadataStorage:
                 ),
             ],
         )
-        tmp_db.load_source(records)
-        rows = tmp_db.query(
+        memory_db.load_source(records)
+        rows = memory_db.query(
             "SELECT json_extract(metadata, '$.department') as dept "
             "FROM encounters WHERE source = 'test_meta'"
         )
@@ -869,11 +852,8 @@ class TestMetadataStorage:
 
 
 @pytest.fixture
-def cross_source_encounter_db(tmp_path):
+def cross_source_encounter_db(memory_db):
     """Database with encounters from multiple sources on the same date."""
-    db = ChartfoldDB(str(tmp_path / "cross.db"))
-    db.init_schema()
-
     epic = UnifiedRecords(
         source="epic_anderson",
         encounters=[
@@ -916,11 +896,10 @@ def cross_source_encounter_db(tmp_path):
             ),
         ],
     )
-    db.load_source(epic)
-    db.load_source(meditech)
-    db.load_source(athena)
-    yield db
-    db.close()
+    memory_db.load_source(epic)
+    memory_db.load_source(meditech)
+    memory_db.load_source(athena)
+    return memory_db
 
 
 class TestCrossSourceEncounterMatching:
@@ -950,6 +929,6 @@ class TestCrossSourceEncounterMatching:
         assert "epic_anderson" in matches[0]["sources"]
         assert "meditech_anderson" in matches[0]["sources"]
 
-    def test_empty_db(self, tmp_db):
-        matches = match_encounters_by_date(tmp_db)
+    def test_empty_db(self, memory_db):
+        matches = match_encounters_by_date(memory_db)
         assert matches == []
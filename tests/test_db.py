@@ -39,6 +39,10 @@ class TestSchemaCreation:
         result = tmp_db.query("PRAGMA journal_mode")
         assert result[0]["journal_mode"] == "wal"
 
+    def test_synchronous_normal(self, tmp_db):
+        result = tmp_db.query("PRAGMA synchronous")
+        assert result[0]["synchronous"] == 1  # NORMAL
+
     def test_foreign_keys_on(self, tmp_db):
         result = tmp_db.query("PRAGMA foreign_keys")
         assert result[0]["foreign_keys"] == 1
@@ -381,7 +385,7 @@ class TestBuildUpsertSql:
     def test_generates_on_conflict_do_update(self):
         sql = _build_upsert_sql(
             "lab_results",
-            ["source", "test_name", "result_date", "value", "unit"],
+            ("source", "test_name", "result_date", "value", "unit"),
             ("source", "test_name", "result_date", "value"),
         )
         assert "ON CONFLICT(source, test_name, result_date, value)" in sql
@@ -390,18 +394,31 @@ class TestBuildUpsertSql:
     def test_all_unique_cols_uses_or_ignore(self):
         sql = _build_upsert_sql(
             "allergies",
-            ["source", "allergen"],
+            ("source", "allergen"),
             ("source", "allergen"),
         )
         assert "INSERT OR IGNORE" in sql
         assert "ON CONFLICT" not in sql
 
+    def test_sql_is_cached_per_table(self):
+        args = ("allergies", ("source", "allergen", "reaction"), ("source", "allergen"))
+        assert _build_upsert_sql(*args) is _build_upsert_sql(*args)
+
     def test_unique_keys_cover_all_table_map_tables(self):
         """Every table in _TABLE_MAP must have a UNIQUE key defined."""
         from chartfold.db import _TABLE_MAP
         for _, table, _ in _TABLE_MAP:
             assert table in _UNIQUE_KEYS, f"Missing UNIQUE key for {table}"
 
+    def test_record_to_row_matches_asdict(self):
+        """The shallow row dict must match asdict() in keys, order and values."""
+        from dataclasses import asdict
+
+        from chartfold.db import _record_to_row
+        lr = LabResult(source="test", test_name="CEA", value="5.8", value_numeric=5.8)
+        row = _record_to_row(lr)
+        assert list(row.items()) == list(asdict(lr).items())
+
 
 class TestLoadDiffStats:
     """Tests for the new/existing/removed diff stats in LoadResult."""
@@ -126,8 +126,6 @@ EPIC_RESULTS_XML = f"""<section xmlns="{NS}">
 class TestEpicResultItems:
     @pytest.fixture
     def results_section(self):
-        from lxml import etree
-
         return etree.fromstring(EPIC_RESULTS_XML)
 
     def test_extract_items(self, results_section):
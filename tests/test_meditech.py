@@ -26,8 +26,19 @@ from chartfold.sources.meditech import (
 )
 
 
-# Sample MEDITECH lab section XML
-MEDITECH_LAB_XML = f"""<section xmlns="{NS}">
+# Section XML in this module is bytes with the CDA namespace spelled out, so
+# nothing is formatted per test and lxml parses it without an encode pass.
+assert NS == "urn:hl7-org:v3"
+
+
+def _pick(record: dict, keys) -> dict:
+    """Project *record* onto *keys* (or an expected dict's keys) for one equality assert."""
+    return {k: record[k] for k in keys}
+
+
+# ── Lab XML fixtures ──
+
+MEDITECH_LAB_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Relevant Diagnostic Tests and/or Laboratory Data</title>
   <text>
     <content styleCode="Bold">Laboratory Results</content>
@@ -73,106 +84,83 @@ MEDITECH_LAB_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechLabExtraction:
-    @pytest.fixture
-    def lab_section(self):
-        from lxml import etree
-
-        return etree.fromstring(MEDITECH_LAB_XML)
+@pytest.fixture(scope="class")
+def labs(parse_xml):
+    return _extract_meditech_labs(parse_xml(MEDITECH_LAB_XML))
 
-    def test_extract_labs(self, lab_section):
-        labs = _extract_meditech_labs(lab_section)
-        assert len(labs) == 3
 
-    def test_lab_values(self, lab_section):
-        labs = _extract_meditech_labs(lab_section)
-        wbc = next(lab for lab in labs if lab["test"] == "White Blood Count")
-        assert wbc["value"] == "3.8"
-        assert wbc["unit"] == "K/mm3"
-        assert wbc["date_iso"] == "2021-11-23"
-        assert wbc["interpretation"] == "Below low normal"
-        assert wbc["ref_range"] == "4.5-10.0"
-
-    def test_cea_extraction(self, lab_section):
-        labs = _extract_meditech_labs(lab_section)
-        cea = next(lab for lab in labs if "Carcinoembryonic" in lab["test"])
-        assert cea["value"] == "1.4"
-        assert cea["unit"] == "ng/mL"
-        assert cea["ref_range"] == "0.0-3.0"
-
-    def test_hemoglobin(self, lab_section):
-        labs = _extract_meditech_labs(lab_section)
-        hgb = next(lab for lab in labs if lab["test"] == "Hemoglobin")
-        assert hgb["value"] == "9.4"
-        assert hgb["interpretation"] == "Below low normal"
+@pytest.fixture(scope="class")
+def labs_by_test(labs):
+    return {lab["test"]: lab for lab in labs}
 
 
-class TestDeduplication:
-    def test_deduplicate_labs(self):
-        labs = [
-            {"test": "WBC", "date_iso": "2021-11-23", "value": "3.8"},
-            {"test": "WBC", "date_iso": "2021-11-23", "value": "3.8"},  # duplicate
-            {"test": "WBC", "date_iso": "2021-12-30", "value": "10.3"},  # different date
-        ]
-        result = deduplicate_labs(labs)
-        assert len(result) == 2
+class TestMeditechLabExtraction:
+    def test_extract_labs(self, labs):
+        assert len(labs) == 3
 
-    def test_deduplicate_notes_keeps_longest(self):
-        notes = [
-            {"type": "Progress Note", "encounter_date": "20220201", "text": "Short note"},
+    def test_lab_values(self, labs_by_test):
+        wbc = labs_by_test["White Blood Count"]
+        expected = {
+            "value": "3.8",
+            "unit": "K/mm3",
+            "date_iso": "2021-11-23",
+            "interpretation": "Below low normal",
+            "ref_range": "4.5-10.0",
+        }
+        assert _pick(wbc, expected) == expected
+
+    def test_cea_extraction(self, labs_by_test):
+        cea = labs_by_test["Carcinoembryonic Antigen"]
+        expected = {"value": "1.4", "unit": "ng/mL", "ref_range": "0.0-3.0"}
+        assert _pick(cea, expected) == expected
+
+    def test_hemoglobin(self, labs_by_test):
+        hgb = labs_by_test["Hemoglobin"]
+        expected = {"value": "9.4", "interpretation": "Below low normal"}
+        assert _pick(hgb, expected) == expected
+
+
+# ── TOC fixtures ──
+
+_TOC_ENTRIES = [
+    {
+        "resourceType": "DocumentReference",
+        "description": "Lab Report",
+        "docStatus": "final",
+        "date": "2026-01-30T21:16:43-06:00",
+        "content": [
             {
-                "type": "Progress Note",
-                "encounter_date": "20220201",
-                "text": "This is a much longer version of the progress note with more detail",
-            },
-        ]
-        result = deduplicate_notes(notes)
-        assert len(result) == 1
-        assert "longer" in result[0]["text"]
-
-    def test_deduplicate_problems(self):
-        problems = [
-            {"name": "Colon Cancer"},
-            {"name": "colon cancer"},  # case-insensitive dup
-            {"name": "Neuropathy"},
-        ]
-        result = deduplicate_problems(problems)
-        assert len(result) == 2
+                "attachment": {
+                    "contentType": "image/pdf",
+                    "url": "Record_Documents\\015_Laboratory\\lab.pdf",
+                    "size": 12345,
+                    "title": "Lab Report",
+                    "creation": "2025-06-30T13:25:00",
+                }
+            }
+        ],
+    },
+    {
+        "resourceType": "DocumentReference",
+        "description": "Consent",
+        "docStatus": "final",
+        "content": [{"attachment": {"url": "consent.pdf", "size": 100, "title": "Consent"}}],
+    },
+]
+
+_TOC_NDJSON_TEXT = "\n".join(json.dumps(e) for e in _TOC_ENTRIES)
+
+
+@pytest.fixture(scope="session")
+def toc_ndjson(tmp_path_factory):
+    toc_file = tmp_path_factory.mktemp("toc") / "toc.ndjson"
+    toc_file.write_text(_TOC_NDJSON_TEXT)
+    return str(toc_file)
 
 
 class TestTOCParser:
-    def test_parse_toc(self, tmp_path):
-        toc_file = tmp_path / "toc.ndjson"
-        entries = [
-            {
-                "resourceType": "DocumentReference",
-                "description": "Lab Report",
-                "docStatus": "final",
-                "date": "2026-01-30T21:16:43-06:00",
-                "content": [
-                    {
-                        "attachment": {
-                            "contentType": "image/pdf",
-                            "url": "Record_Documents\\015_Laboratory\\lab.pdf",
-                            "size": 12345,
-                            "title": "Lab Report",
-                            "creation": "2025-06-30T13:25:00",
-                        }
-                    }
-                ],
-            },
-            {
-                "resourceType": "DocumentReference",
-                "description": "Consent",
-                "docStatus": "final",
-                "content": [
-                    {"attachment": {"url": "consent.pdf", "size": 100, "title": "Consent"}}
-                ],
-            },
-        ]
-        toc_file.write_text("\n".join(json.dumps(e) for e in entries))
-
-        result = _parse_toc(str(toc_file))
+    def test_parse_toc(self, toc_ndjson):
+        result = _parse_toc(toc_ndjson)
         assert len(result) == 2
         assert result[0]["description"] == "Lab Report"
         assert result[0]["size"] == 12345
@@ -181,7 +169,7 @@ class TestTOCParser:
 
 # ── Vitals XML fixtures ──
 
-MEDITECH_VITALS_XML = f"""<section xmlns="{NS}">
+MEDITECH_VITALS_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Vital Signs</title>
   <text>
     <table>
@@ -254,73 +242,45 @@ MEDITECH_VITALS_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechVitalsExtraction:
-    @pytest.fixture
-    def vitals_section(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def vitals(parse_xml):
+    return _extract_meditech_vitals(parse_xml(MEDITECH_VITALS_XML))
+
+
+@pytest.fixture(scope="class")
+def vitals_by_type(vitals):
+    return {v["type"]: v for v in vitals}
 
-        return etree.fromstring(MEDITECH_VITALS_XML)
 
-    def test_extract_all_vitals(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
+class TestMeditechVitalsExtraction:
+    def test_extract_all_vitals(self, vitals):
         assert len(vitals) == 9
 
-    def test_height(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        height = next(v for v in vitals if v["type"] == "height")
-        assert height["value"] == 73.0
-        assert height["unit"] == "in_i"
-        assert height["date_iso"] == "2021-11-22"
-
-    def test_weight(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        weight = next(v for v in vitals if v["type"] == "weight")
-        assert weight["value"] == 105.70
-        assert weight["unit"] == "kg"
-
-    def test_temperature_bracketed_unit(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        temp = next(v for v in vitals if v["type"] == "temperature")
-        assert temp["value"] == 96.8
-        assert temp["unit"] == "degF"
-
-    def test_heart_rate(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        hr = next(v for v in vitals if v["type"] == "heart_rate")
-        assert hr["value"] == 72.0
-        assert hr["unit"] == "bpm"
-
-    def test_bp_systolic(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        bp = next(v for v in vitals if v["type"] == "bp_systolic")
-        assert bp["value"] == 130.0
-
-    def test_bp_diastolic(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        bp = next(v for v in vitals if v["type"] == "bp_diastolic")
-        assert bp["value"] == 82.0
-
-    def test_spo2(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        spo2 = next(v for v in vitals if v["type"] == "spo2")
-        assert spo2["value"] == 98.0
-
-    def test_bmi_with_ref_range(self, vitals_section):
-        vitals = _extract_meditech_vitals(vitals_section)
-        bmi = next(v for v in vitals if v["type"] == "bmi")
-        assert bmi["value"] == 30.64
-        assert bmi["ref_range"] == "18.5-24.9"
-
-    def test_empty_section(self):
-        from lxml import etree
-
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Vital Signs</title></section>')
-        assert _extract_meditech_vitals(empty) == []
-
-    def test_unknown_vital_name_ignored(self):
-        from lxml import etree
-
-        xml = f"""<section xmlns="{NS}">
+    @pytest.mark.parametrize(
+        ("vtype", "field", "expected"),
+        [
+            ("height", "value", 73.0),
+            ("height", "unit", "in_i"),
+            ("height", "date_iso", "2021-11-22"),
+            ("weight", "value", 105.70),
+            ("weight", "unit", "kg"),
+            # Bracketed UCUM unit: "96.8 [degF]"
+            ("temperature", "value", 96.8),
+            ("temperature", "unit", "degF"),
+            ("heart_rate", "value", 72.0),
+            ("heart_rate", "unit", "bpm"),
+            ("bp_systolic", "value", 130.0),
+            ("bp_diastolic", "value", 82.0),
+            ("spo2", "value", 98.0),
+            ("bmi", "value", 30.64),
+            ("bmi", "ref_range", "18.5-24.9"),
+        ],
+    )
+    def test_vital_field(self, vitals_by_type, vtype, field, expected):
+        assert vitals_by_type[vtype][field] == expected
+
+    def test_unknown_vital_name_ignored(self, parse_xml):
+        xml = b"""<section xmlns="urn:hl7-org:v3">
           <text>
             <table>
               <thead><tr><th>Vital Reading</th><th>Result</th></tr></thead>
@@ -328,14 +288,14 @@ class TestMeditechVitalsExtraction:
             </table>
           </text>
         </section>"""
-        section = etree.fromstring(xml)
+        section = parse_xml(xml)
         vitals = _extract_meditech_vitals(section)
         assert len(vitals) == 0
 
 
 # ── Immunizations XML fixtures ──
 
-MEDITECH_IMMUNIZATIONS_XML = f"""<section xmlns="{NS}">
+MEDITECH_IMMUNIZATIONS_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Immunizations</title>
   <text>
     <table>
@@ -372,45 +332,40 @@ MEDITECH_IMMUNIZATIONS_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechImmunizationsExtraction:
-    @pytest.fixture
-    def imm_section(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def imms(parse_xml):
+    return _extract_meditech_immunizations(parse_xml(MEDITECH_IMMUNIZATIONS_XML))
 
-        return etree.fromstring(MEDITECH_IMMUNIZATIONS_XML)
 
-    def test_extract_immunizations(self, imm_section):
-        imms = _extract_meditech_immunizations(imm_section)
-        assert len(imms) == 2
+@pytest.fixture(scope="class")
+def imms_by_vaccine(imms):
+    """Index immunizations by vaccine family (the name up to the first comma)."""
+    return {i["name"].split(",")[0]: i for i in imms}
 
-    def test_flu_vaccine(self, imm_section):
-        imms = _extract_meditech_immunizations(imm_section)
-        flu = next(i for i in imms if "Influenza" in i["name"])
-        assert flu["date_iso"] == "2024-10-15"
-        assert flu["lot"] == "ABC123"
-        assert flu["manufacturer"] == "Sanofi Pasteur"
 
-    def test_covid_vaccine(self, imm_section):
-        imms = _extract_meditech_immunizations(imm_section)
-        covid = next(i for i in imms if "COVID" in i["name"])
-        assert covid["date_iso"] == "2023-09-20"
-        assert covid["lot"] == "XY789"
+class TestMeditechImmunizationsExtraction:
+    def test_extract_immunizations(self, imms):
+        assert len(imms) == 2
 
-    def test_empty_section(self):
-        from lxml import etree
+    def test_flu_vaccine(self, imms_by_vaccine):
+        flu = imms_by_vaccine["Influenza"]
+        expected = {"date_iso": "2024-10-15", "lot": "ABC123", "manufacturer": "Sanofi Pasteur"}
+        assert _pick(flu, expected) == expected
 
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Immunizations</title></section>')
-        assert _extract_meditech_immunizations(empty) == []
+    def test_covid_vaccine(self, imms_by_vaccine):
+        covid = imms_by_vaccine["COVID-19"]
+        expected = {"date_iso": "2023-09-20", "lot": "XY789"}
+        assert _pick(covid, expected) == expected
 
 
 # ── Allergies XML fixtures ──
 
-MEDITECH_NO_ALLERGIES_XML = f"""<section xmlns="{NS}">
+MEDITECH_NO_ALLERGIES_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Allergies, Adverse Reactions, Alerts</title>
   <text>No known allergies</text>
 </section>"""
 
-MEDITECH_NEGATION_ALLERGIES_XML = f"""<section xmlns="{NS}">
+MEDITECH_NEGATION_ALLERGIES_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Allergies</title>
   <text>No known allergies</text>
   <entry>
@@ -424,7 +379,7 @@ MEDITECH_NEGATION_ALLERGIES_XML = f"""<section xmlns="{NS}">
   </entry>
 </section>"""
 
-MEDITECH_REAL_ALLERGIES_XML = f"""<section xmlns="{NS}">
+MEDITECH_REAL_ALLERGIES_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Allergies</title>
   <text>
     <table>
@@ -455,48 +410,39 @@ MEDITECH_REAL_ALLERGIES_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechAllergiesExtraction:
-    def test_no_known_allergies_text(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def real_allergies(parse_xml):
+    return _extract_meditech_allergies(parse_xml(MEDITECH_REAL_ALLERGIES_XML))
 
-        section = etree.fromstring(MEDITECH_NO_ALLERGIES_XML)
-        assert _extract_meditech_allergies(section) == []
 
-    def test_no_known_allergies_negation(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def real_allergies_by_allergen(real_allergies):
+    return {a["allergen"]: a for a in real_allergies}
 
-        section = etree.fromstring(MEDITECH_NEGATION_ALLERGIES_XML)
-        assert _extract_meditech_allergies(section) == []
 
-    def test_real_allergies(self):
-        from lxml import etree
+class TestMeditechAllergiesExtraction:
+    def test_no_known_allergies_text(self, parse_xml):
+        section = parse_xml(MEDITECH_NO_ALLERGIES_XML)
+        assert _extract_meditech_allergies(section) == []
 
-        section = etree.fromstring(MEDITECH_REAL_ALLERGIES_XML)
-        allergies = _extract_meditech_allergies(section)
-        assert len(allergies) == 2
-        pen = next(a for a in allergies if a["allergen"] == "Penicillin")
-        assert pen["reaction"] == "Rash"
-        assert pen["severity"] == "Moderate"
-        assert pen["status"] == "Active"
+    def test_no_known_allergies_negation(self, parse_xml):
+        section = parse_xml(MEDITECH_NEGATION_ALLERGIES_XML)
+        assert _extract_meditech_allergies(section) == []
 
-    def test_sulfa_allergy(self):
-        from lxml import etree
+    def test_real_allergies(self, real_allergies, real_allergies_by_allergen):
+        assert len(real_allergies) == 2
+        pen = real_allergies_by_allergen["Penicillin"]
+        expected = {"reaction": "Rash", "severity": "Moderate", "status": "Active"}
+        assert _pick(pen, expected) == expected
 
-        section = etree.fromstring(MEDITECH_REAL_ALLERGIES_XML)
-        allergies = _extract_meditech_allergies(section)
-        sulfa = next(a for a in allergies if "Sulfa" in a["allergen"])
+    def test_sulfa_allergy(self, real_allergies_by_allergen):
+        sulfa = real_allergies_by_allergen["Sulfa drugs"]
         assert sulfa["severity"] == "Severe"
 
-    def test_empty_section(self):
-        from lxml import etree
-
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Allergies</title></section>')
-        assert _extract_meditech_allergies(empty) == []
-
 
 # ── Social History XML fixtures ──
 
-MEDITECH_SOCIAL_HISTORY_XML = f"""<section xmlns="{NS}">
+MEDITECH_SOCIAL_HISTORY_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Social History</title>
   <text/>
   <entry>
@@ -515,40 +461,34 @@ MEDITECH_SOCIAL_HISTORY_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechSocialHistoryExtraction:
-    @pytest.fixture
-    def sh_section(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def social_history(parse_xml):
+    return _extract_meditech_social_history(parse_xml(MEDITECH_SOCIAL_HISTORY_XML))
 
-        return etree.fromstring(MEDITECH_SOCIAL_HISTORY_XML)
 
-    def test_extract_social_history(self, sh_section):
-        entries = _extract_meditech_social_history(sh_section)
-        assert len(entries) == 2
+@pytest.fixture(scope="class")
+def social_history_by_category(social_history):
+    return {e["category"]: e for e in social_history}
 
-    def test_smoking_status(self, sh_section):
-        entries = _extract_meditech_social_history(sh_section)
-        smoking = next(e for e in entries if e["category"] == "tobacco_smoking_status")
-        assert smoking["value"] == "Never smoker"
-        assert smoking["loinc"] == "72166-2"
-        assert smoking["date_iso"] == "2021-11-22"
 
-    def test_sex_assigned(self, sh_section):
-        entries = _extract_meditech_social_history(sh_section)
-        sex = next(e for e in entries if e["category"] == "sex_assigned_at_birth")
-        assert sex["value"] == "Male"
-        assert sex["loinc"] == "76689-9"
+class TestMeditechSocialHistoryExtraction:
+    def test_extract_social_history(self, social_history):
+        assert len(social_history) == 2
 
-    def test_empty_section(self):
-        from lxml import etree
+    def test_smoking_status(self, social_history_by_category):
+        smoking = social_history_by_category["tobacco_smoking_status"]
+        expected = {"value": "Never smoker", "loinc": "72166-2", "date_iso": "2021-11-22"}
+        assert _pick(smoking, expected) == expected
 
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Social History</title></section>')
-        assert _extract_meditech_social_history(empty) == []
+    def test_sex_assigned(self, social_history_by_category):
+        sex = social_history_by_category["sex_assigned_at_birth"]
+        expected = {"value": "Male", "loinc": "76689-9"}
+        assert _pick(sex, expected) == expected
 
 
 # ── Family History XML fixtures ──
 
-MEDITECH_FAMILY_HISTORY_STRUCTURED_XML = f"""<section xmlns="{NS}"
+MEDITECH_FAMILY_HISTORY_STRUCTURED_XML = b"""<section xmlns="urn:hl7-org:v3"
   xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
   <title>Family History</title>
   <text/>
@@ -573,7 +513,7 @@ MEDITECH_FAMILY_HISTORY_STRUCTURED_XML = f"""<section xmlns="{NS}"
   </entry>
 </section>"""
 
-MEDITECH_FAMILY_HISTORY_TABLE_XML = f"""<section xmlns="{NS}">
+MEDITECH_FAMILY_HISTORY_TABLE_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Family History</title>
   <text>
     <table>
@@ -605,38 +545,25 @@ MEDITECH_FAMILY_HISTORY_TABLE_XML = f"""<section xmlns="{NS}">
 
 
 class TestMeditechFamilyHistoryExtraction:
-    def test_structured_entries(self):
-        from lxml import etree
-
-        section = etree.fromstring(MEDITECH_FAMILY_HISTORY_STRUCTURED_XML)
+    def test_structured_entries(self, parse_xml):
+        section = parse_xml(MEDITECH_FAMILY_HISTORY_STRUCTURED_XML)
         entries = _extract_meditech_family_history(section)
-        assert len(entries) == 2
-        assert entries[0]["relation"] == "Father"
-        assert entries[0]["condition"] == "Carcinoma of colon"
-        assert entries[1]["condition"] == "Hypertension"
-
-    def test_table_fallback(self):
-        from lxml import etree
+        assert [_pick(e, ("relation", "condition")) for e in entries] == [
+            {"relation": "Father", "condition": "Carcinoma of colon"},
+            {"relation": "Father", "condition": "Hypertension"},
+        ]
 
-        section = etree.fromstring(MEDITECH_FAMILY_HISTORY_TABLE_XML)
+    def test_table_fallback(self, parse_xml):
+        section = parse_xml(MEDITECH_FAMILY_HISTORY_TABLE_XML)
         entries = _extract_meditech_family_history(section)
         assert len(entries) == 2
-        mother = next(e for e in entries if e["relation"] == "Mother")
-        assert mother["condition"] == "Type 2 Diabetes"
-        father = next(e for e in entries if e["relation"] == "Father")
-        assert father["condition"] == "Heart Disease"
+        by_relation = {e["relation"]: e for e in entries}
+        assert by_relation["Mother"]["condition"] == "Type 2 Diabetes"
+        assert by_relation["Father"]["condition"] == "Heart Disease"
 
-    def test_empty_section(self):
-        from lxml import etree
-
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Family History</title></section>')
-        assert _extract_meditech_family_history(empty) == []
-
-    def test_nullflavor_relation(self):
+    def test_nullflavor_relation(self, parse_xml):
         """When relation has nullFlavor, falls back to 'Not Specified'."""
-        from lxml import etree
-
-        xml = f"""<section xmlns="{NS}"
+        xml = b"""<section xmlns="urn:hl7-org:v3"
           xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
           <title>Family History</title>
           <text/>
@@ -655,16 +582,16 @@ class TestMeditechFamilyHistoryExtraction:
             </organizer>
           </entry>
         </section>"""
-        section = etree.fromstring(xml)
+        section = parse_xml(xml)
         entries = _extract_meditech_family_history(section)
-        assert len(entries) == 1
-        assert entries[0]["relation"] == "Not Specified"
-        assert entries[0]["condition"] == "Asthma"
+        assert [_pick(e, ("relation", "condition")) for e in entries] == [
+            {"relation": "Not Specified", "condition": "Asthma"},
+        ]
 
 
 # ── Mental Status XML fixtures ──
 
-MEDITECH_MENTAL_STATUS_XML = f"""<section xmlns="{NS}">
+MEDITECH_MENTAL_STATUS_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Mental Status</title>
   <text>
     <table>
@@ -691,7 +618,7 @@ MEDITECH_MENTAL_STATUS_XML = f"""<section xmlns="{NS}">
   </text>
 </section>"""
 
-MEDITECH_MENTAL_STATUS_STRUCTURED_XML = f"""<section xmlns="{NS}">
+MEDITECH_MENTAL_STATUS_STRUCTURED_XML = b"""<section xmlns="urn:hl7-org:v3">
   <title>Mental Status</title>
   <text/>
   <entry>
@@ -704,105 +631,167 @@ MEDITECH_MENTAL_STATUS_STRUCTURED_XML = f"""<section xmlns="{NS}">
 </section>"""
 
 
-class TestMeditechMentalStatusExtraction:
-    def test_table_extraction(self):
-        from lxml import etree
+@pytest.fixture(scope="class")
+def mental_status(parse_xml):
+    return _extract_meditech_mental_status(parse_xml(MEDITECH_MENTAL_STATUS_XML))
 
-        section = etree.fromstring(MEDITECH_MENTAL_STATUS_XML)
-        entries = _extract_meditech_mental_status(section)
-        assert len(entries) == 2
 
-    def test_observation_values(self):
-        from lxml import etree
+class TestMeditechMentalStatusExtraction:
+    def test_table_extraction(self, mental_status):
+        assert len(mental_status) == 2
 
-        section = etree.fromstring(MEDITECH_MENTAL_STATUS_XML)
-        entries = _extract_meditech_mental_status(section)
-        q1 = entries[0]
+    def test_observation_values(self, mental_status):
+        q1 = mental_status[0]
         assert "Little interest" in q1["observation"]
-        assert q1["response"] == "Not at all"
-        assert q1["date_iso"] == "2021-11-22"
+        expected = {"response": "Not at all", "date_iso": "2021-11-22"}
+        assert _pick(q1, expected) == expected
 
-    def test_second_observation(self):
-        from lxml import etree
-
-        section = etree.fromstring(MEDITECH_MENTAL_STATUS_XML)
-        entries = _extract_meditech_mental_status(section)
-        q2 = entries[1]
+    def test_second_observation(self, mental_status):
+        q2 = mental_status[1]
         assert "depressed" in q2["observation"]
         assert q2["response"] == "Several days"
 
-    def test_structured_fallback(self):
-        from lxml import etree
-
-        section = etree.fromstring(MEDITECH_MENTAL_STATUS_STRUCTURED_XML)
+    def test_structured_fallback(self, parse_xml):
+        section = parse_xml(MEDITECH_MENTAL_STATUS_STRUCTURED_XML)
         entries = _extract_meditech_mental_status(section)
-        assert len(entries) == 1
-        assert entries[0]["observation"] == "PHQ-2 total score"
-        assert entries[0]["response"] == "1"
-        assert entries[0]["date_iso"] == "2021-11-22"
+        expected = {"observation": "PHQ-2 total score", "response": "1", "date_iso": "2021-11-22"}
+        assert [_pick(e, expected) for e in entries] == [expected]
+
+
+# ── Empty sections ──
+
+_EMPTY_SECTIONS = {
+    "vitals": (
+        _extract_meditech_vitals,
+        b'<section xmlns="urn:hl7-org:v3"><title>Vital Signs</title></section>',
+    ),
+    "immunizations": (
+        _extract_meditech_immunizations,
+        b'<section xmlns="urn:hl7-org:v3"><title>Immunizations</title></section>',
+    ),
+    "allergies": (
+        _extract_meditech_allergies,
+        b'<section xmlns="urn:hl7-org:v3"><title>Allergies</title></section>',
+    ),
+    "social_history": (
+        _extract_meditech_social_history,
+        b'<section xmlns="urn:hl7-org:v3"><title>Social History</title></section>',
+    ),
+    "family_history": (
+        _extract_meditech_family_history,
+        b'<section xmlns="urn:hl7-org:v3"><title>Family History</title></section>',
+    ),
+    "mental_status": (
+        _extract_meditech_mental_status,
+        b'<section xmlns="urn:hl7-org:v3"><title>Mental Status</title></section>',
+    ),
+}
+
+
+class TestEmptySections:
+    @pytest.mark.parametrize("name", list(_EMPTY_SECTIONS))
+    def test_empty_section(self, parse_xml, name):
+        extract, xml = _EMPTY_SECTIONS[name]
+        assert extract(parse_xml(xml)) == []
+
+
+# ── Deduplication ──
+
+# Inputs are module-level tuples: the dedup helpers never mutate their input,
+# so every test shares the same records.
+_DEDUP_LABS_INPUT = (
+    {"test": "WBC", "date_iso": "2021-11-23", "value": "3.8"},
+    {"test": "WBC", "date_iso": "2021-11-23", "value": "3.8"},  # duplicate
+    {"test": "WBC", "date_iso": "2021-12-30", "value": "10.3"},  # different date
+)
 
-    def test_empty_section(self):
-        from lxml import etree
+_DEDUP_NOTES_INPUT = (
+    {"type": "Progress Note", "encounter_date": "20220201", "text": "Short note"},
+    {
+        "type": "Progress Note",
+        "encounter_date": "20220201",
+        "text": "This is a much longer version of the progress note with more detail",
+    },
+)
 
-        empty = etree.fromstring(f'<section xmlns="{NS}"><title>Mental Status</title></section>')
-        assert _extract_meditech_mental_status(empty) == []
+_DEDUP_PROBLEMS_INPUT = (
+    {"name": "Colon Cancer"},
+    {"name": "colon cancer"},  # case-insensitive dup
+    {"name": "Neuropathy"},
+)
 
+_DEDUP_VITALS_INPUT = (
+    {"type": "weight", "date_iso": "2021-11-22", "value": 105.7},
+    {"type": "weight", "date_iso": "2021-11-22", "value": 105.7},  # dup
+    {"type": "weight", "date_iso": "2021-12-01", "value": 106.0},  # diff date
+    {"type": "height", "date_iso": "2021-11-22", "value": 73.0},
+)
 
-# ── Deduplication tests for new types ──
+_DEDUP_IMMUNIZATIONS_INPUT = (
+    {"name": "Influenza", "date_iso": "2024-10-15"},
+    {"name": "influenza", "date_iso": "2024-10-15"},  # case dup
+    {"name": "COVID-19", "date_iso": "2023-09-20"},
+)
 
+_DEDUP_ALLERGIES_INPUT = (
+    {"allergen": "Penicillin", "reaction": "Rash"},
+    {"allergen": "penicillin", "reaction": "Hives"},  # dup by allergen
+    {"allergen": "Sulfa drugs", "reaction": "Rash"},
+)
 
-class TestNewDeduplication:
-    def test_deduplicate_vitals(self):
-        vitals = [
-            {"type": "weight", "date_iso": "2021-11-22", "value": 105.7},
-            {"type": "weight", "date_iso": "2021-11-22", "value": 105.7},  # dup
-            {"type": "weight", "date_iso": "2021-12-01", "value": 106.0},  # diff date
-            {"type": "height", "date_iso": "2021-11-22", "value": 73.0},
-        ]
-        result = deduplicate_vitals(vitals)
-        assert len(result) == 3
-
-    def test_deduplicate_immunizations(self):
-        imms = [
-            {"name": "Influenza", "date_iso": "2024-10-15"},
-            {"name": "influenza", "date_iso": "2024-10-15"},  # case dup
-            {"name": "COVID-19", "date_iso": "2023-09-20"},
-        ]
-        result = deduplicate_immunizations(imms)
-        assert len(result) == 2
+_DEDUP_SOCIAL_HISTORY_INPUT = (
+    {"category": "tobacco_smoking_status", "value": "Never smoker"},
+    {"category": "Tobacco_Smoking_Status", "value": "never smoker"},  # dup
+    {"category": "sex_assigned_at_birth", "value": "Male"},
+)
 
-    def test_deduplicate_allergies(self):
-        allergies = [
-            {"allergen": "Penicillin", "reaction": "Rash"},
-            {"allergen": "penicillin", "reaction": "Hives"},  # dup by allergen
-            {"allergen": "Sulfa drugs", "reaction": "Rash"},
-        ]
-        result = deduplicate_allergies(allergies)
-        assert len(result) == 2
+_DEDUP_FAMILY_HISTORY_INPUT = (
+    {"relation": "Father", "condition": "Colon Cancer"},
+    {"relation": "father", "condition": "colon cancer"},  # dup
+    {"relation": "Mother", "condition": "Diabetes"},
+)
 
-    def test_deduplicate_social_history(self):
-        entries = [
-            {"category": "tobacco_smoking_status", "value": "Never smoker"},
-            {"category": "Tobacco_Smoking_Status", "value": "never smoker"},  # dup
-            {"category": "sex_assigned_at_birth", "value": "Male"},
-        ]
-        result = deduplicate_social_history(entries)
-        assert len(result) == 2
+_DEDUP_MENTAL_STATUS_INPUT = (
+    {"observation": "PHQ-2 Q1", "response": "Not at all", "date_iso": "2021-11-22"},
+    {"observation": "phq-2 q1", "response": "not at all", "date_iso": "2021-11-22"},  # dup
+    {"observation": "PHQ-2 Q2", "response": "Several days", "date_iso": "2021-11-22"},
+)
 
-    def test_deduplicate_family_history(self):
-        entries = [
-            {"relation": "Father", "condition": "Colon Cancer"},
-            {"relation": "father", "condition": "colon cancer"},  # dup
-            {"relation": "Mother", "condition": "Diabetes"},
-        ]
-        result = deduplicate_family_history(entries)
+
+class TestDeduplication:
+    def test_deduplicate_labs(self):
+        result = deduplicate_labs(_DEDUP_LABS_INPUT)
         assert len(result) == 2
 
-    def test_deduplicate_mental_status(self):
-        entries = [
-            {"observation": "PHQ-2 Q1", "response": "Not at all", "date_iso": "2021-11-22"},
-            {"observation": "phq-2 q1", "response": "not at all", "date_iso": "2021-11-22"},  # dup
-            {"observation": "PHQ-2 Q2", "response": "Several days", "date_iso": "2021-11-22"},
-        ]
-        result = deduplicate_mental_status(entries)
+    def test_deduplicate_notes_keeps_longest(self):
+        result = deduplicate_notes(_DEDUP_NOTES_INPUT)
+        assert len(result) == 1
+        assert "longer" in result[0]["text"]
+
+    def test_deduplicate_problems(self):
+        result = deduplicate_problems(_DEDUP_PROBLEMS_INPUT)
         assert len(result) == 2
+
+
+class TestNewDeduplication:
+    @pytest.mark.parametrize(
+        ("func", "inputs", "expected_len"),
+        [
+            (deduplicate_vitals, _DEDUP_VITALS_INPUT, 3),
+            (deduplicate_immunizations, _DEDUP_IMMUNIZATIONS_INPUT, 2),
+            (deduplicate_allergies, _DEDUP_ALLERGIES_INPUT, 2),
+            (deduplicate_social_history, _DEDUP_SOCIAL_HISTORY_INPUT, 2),
+            (deduplicate_family_history, _DEDUP_FAMILY_HISTORY_INPUT, 2),
+            (deduplicate_mental_status, _DEDUP_MENTAL_STATUS_INPUT, 2),
+        ],
+        ids=[
+            "vitals",
+            "immunizations",
+            "allergies",
+            "social_history",
+            "family_history",
+            "mental_status",
+        ],
+    )
+    def test_dedup(self, func, inputs, expected_len):
+        assert len(func(inputs)) == expected_len
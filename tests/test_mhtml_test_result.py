@@ -3,6 +3,7 @@
 import email
 import email.mime.multipart
 import email.mime.text
+import email.policy
 import quopri
 
 import pytest
@@ -12,9 +13,9 @@ from chartfold.adapters.mhtml_test_result_adapter import (
     _parser_counts,
     test_result_to_unified as adapt_test_result,
 )
-from chartfold.db import ChartfoldDB
 from chartfold.sources.mhtml_test_result import (
     ParsedTestResult,
+    _leading_html_part,
     parse_test_result_mhtml,
 )
 
@@ -22,19 +23,24 @@ from chartfold.sources.mhtml_test_result import (
 # --- Fixtures ---
 
 
-def _make_test_result_mhtml(html_body: str) -> bytes:
-    """Build a minimal MHTML file with test-result HTML for testing."""
-    msg = email.mime.multipart.MIMEMultipart("related")
-    msg["Subject"] = "MyChart - Test Results"
-    msg["MIME-Version"] = "1.0"
+_MHTML_TEMPLATE = """\
+Subject: MyChart - Test Results
+MIME-Version: 1.0
+Content-Type: multipart/related; boundary="chartfold-test-boundary"
+
+--chartfold-test-boundary
+Content-Type: text/html; charset="utf-8"
+Content-Transfer-Encoding: quoted-printable
+
+{qp_body}
+--chartfold-test-boundary--
+"""
 
-    html_part = email.mime.text.MIMEText(html_body, "html", "utf-8")
-    html_part.replace_header("Content-Transfer-Encoding", "quoted-printable")
-    html_bytes = html_body.encode("utf-8")
-    html_part.set_payload(quopri.encodestring(html_bytes).decode("ascii"))
-    msg.attach(html_part)
 
-    return msg.as_bytes()
+def _make_test_result_mhtml(html_body: str) -> bytes:
+    """Build a minimal MHTML file with test-result HTML for testing."""
+    qp_body = quopri.encodestring(html_body.encode("utf-8")).decode("ascii")
+    return _MHTML_TEMPLATE.format(qp_body=qp_body).encode("ascii")
 
 
 _SAMPLE_HTML = """\
@@ -261,19 +267,28 @@ _SAMPLE_HTML = """\
 </html>
 """
 
+_SAMPLE_MHTML_BYTES = _make_test_result_mhtml(_SAMPLE_HTML)
+# One line long enough that quoted-printable wraps it with "=" soft breaks,
+# including one inside the encoded multi-byte character.
+_SOFT_BREAK_MHTML_BYTES = _make_test_result_mhtml(
+    "<p>" + "x" * 68 + "\u00e9\u00e9 Variant: TP53 " + "y" * 80 + "</p>\n"
+)
+
 
-@pytest.fixture
-def sample_mhtml(tmp_path):
-    """Write a sample test-result MHTML to a temp file."""
-    mhtml_bytes = _make_test_result_mhtml(_SAMPLE_HTML)
-    path = tmp_path / "tempus.mhtml"
-    path.write_bytes(mhtml_bytes)
+@pytest.fixture(scope="module")
+def sample_mhtml(tmp_path_factory):
+    """Write a sample test-result MHTML to a temp file (once per module)."""
+    path = tmp_path_factory.mktemp("mhtml") / "tempus.mhtml"
+    path.write_bytes(_SAMPLE_MHTML_BYTES)
     return str(path)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_parsed():
-    """Return a ParsedTestResult built from sample HTML (no file I/O)."""
+    """Return a ParsedTestResult built from sample HTML (no file I/O).
+
+    Shared across the module; tests and the adapter only read from it.
+    """
     from chartfold.sources.mhtml_test_result import _extract_from_html
 
     result = ParsedTestResult()
@@ -285,92 +300,91 @@ def sample_parsed():
 
 
 class TestTestResultParser:
-    def test_parse_test_name(self, sample_parsed):
-        assert sample_parsed.test_name == "TEMPUS XF"
-
-    def test_parse_panel(self, sample_parsed):
-        assert sample_parsed.panel == "523 gene liquid biopsy"
-
-    def test_parse_provider(self, sample_parsed):
-        assert sample_parsed.provider == "Benjamin Tan, MD"
-
-    def test_parse_collection_date(self, sample_parsed):
-        assert sample_parsed.collection_date == "2025-07-08"
-
-    def test_parse_result_date(self, sample_parsed):
-        assert sample_parsed.result_date == "2025-07-15"
-
-    def test_parse_specimen(self, sample_parsed):
-        assert sample_parsed.specimen == "Blood"
-
-    def test_parse_status(self, sample_parsed):
-        assert sample_parsed.status == "Final"
-
-    def test_parse_lab_name(self, sample_parsed):
-        assert sample_parsed.lab_name == "TEMPUS LAB"
-
-    def test_parse_overall_interpretation(self, sample_parsed):
-        assert sample_parsed.overall_interpretation == "inconclusive"
-
-    def test_parse_tmb(self, sample_parsed):
-        assert sample_parsed.tmb_value == "2.2"
-        assert sample_parsed.tmb_unit == "m/MB"
-
-    def test_parse_msi(self, sample_parsed):
-        assert sample_parsed.msi_status == "MSI-High not detected"
-
-    def test_parse_treatment_implications(self, sample_parsed):
-        assert sample_parsed.treatment_implications == "No reportable treatment options found."
-
-    def test_parse_reason(self, sample_parsed):
-        assert sample_parsed.reason == "To identify mutations"
+    @pytest.mark.parametrize(
+        ("attr", "expected"),
+        [
+            ("test_name", "TEMPUS XF"),
+            ("panel", "523 gene liquid biopsy"),
+            ("provider", "Benjamin Tan, MD"),
+            ("collection_date", "2025-07-08"),
+            ("result_date", "2025-07-15"),
+            ("specimen", "Blood"),
+            ("status", "Final"),
+            ("lab_name", "TEMPUS LAB"),
+            ("overall_interpretation", "inconclusive"),
+            ("tmb_value", "2.2"),
+            ("tmb_unit", "m/MB"),
+            ("msi_status", "MSI-High not detected"),
+            ("treatment_implications", "No reportable treatment options found."),
+            ("reason", "To identify mutations"),
+        ],
+    )
+    def test_field(self, sample_parsed, attr, expected):
+        assert getattr(sample_parsed, attr) == expected
 
     def test_parse_variant_count(self, sample_parsed):
         assert len(sample_parsed.variants) == 2
 
-    def test_parse_variant_gene(self, sample_parsed):
-        assert sample_parsed.variants[0].gene == "ABCC3"
-        assert sample_parsed.variants[1].gene == "TP53"
-
-    def test_parse_variant_dna_change(self, sample_parsed):
-        assert sample_parsed.variants[0].dna_change == "c.1369G>A"
-        assert sample_parsed.variants[1].dna_change == "c.713G>A"
-
-    def test_parse_variant_protein_change(self, sample_parsed):
-        assert sample_parsed.variants[0].protein_change == "p.A457T"
-        assert sample_parsed.variants[1].protein_change == "p.C238Y"
-
-    def test_parse_variant_type(self, sample_parsed):
-        assert sample_parsed.variants[0].variant_type == "Missense variant"
-        assert sample_parsed.variants[1].variant_type == "Missense variant"
-
-    def test_parse_variant_assessment(self, sample_parsed):
-        assert sample_parsed.variants[0].assessment == "Detected"
-
-    def test_parse_variant_classification(self, sample_parsed):
-        assert sample_parsed.variants[0].classification == "Uncertain significance"
-        assert sample_parsed.variants[1].classification == "Pathogenic"
-
-    def test_parse_variant_origin(self, sample_parsed):
-        assert sample_parsed.variants[0].variant_origin == "Unknown genomic origin"
-        assert sample_parsed.variants[1].variant_origin == "Somatic"
-
-    def test_parse_variant_vaf(self, sample_parsed):
-        assert sample_parsed.variants[0].vaf == "53.2%"
-        assert sample_parsed.variants[1].vaf == "0.7%"
-
-    def test_parse_variant_transcript(self, sample_parsed):
-        assert sample_parsed.variants[0].transcript == "NM_003786"
-        assert sample_parsed.variants[1].transcript == "NM_000546"
-
-    def test_parse_variant_analysis_method(self, sample_parsed):
-        assert sample_parsed.variants[0].analysis_method == "Sequencing"
+    @pytest.mark.parametrize(
+        ("index", "attr", "expected"),
+        [
+            (0, "gene", "ABCC3"),
+            (1, "gene", "TP53"),
+            (0, "dna_change", "c.1369G>A"),
+            (1, "dna_change", "c.713G>A"),
+            (0, "protein_change", "p.A457T"),
+            (1, "protein_change", "p.C238Y"),
+            (0, "variant_type", "Missense variant"),
+            (1, "variant_type", "Missense variant"),
+            (0, "assessment", "Detected"),
+            (0, "classification", "Uncertain significance"),
+            (1, "classification", "Pathogenic"),
+            (0, "variant_origin", "Unknown genomic origin"),
+            (1, "variant_origin", "Somatic"),
+            (0, "vaf", "53.2%"),
+            (1, "vaf", "0.7%"),
+            (0, "transcript", "NM_003786"),
+            (1, "transcript", "NM_000546"),
+            (0, "analysis_method", "Sequencing"),
+        ],
+    )
+    def test_variant_field(self, sample_parsed, index, attr, expected):
+        assert getattr(sample_parsed.variants[index], attr) == expected
 
     def test_parse_from_mhtml_file(self, sample_mhtml):
         result = parse_test_result_mhtml(sample_mhtml)
         assert result.test_name == "TEMPUS XF"
         assert len(result.variants) == 2
 
+    @pytest.mark.parametrize(
+        "data",
+        [
+            _SAMPLE_MHTML_BYTES,
+            _SAMPLE_MHTML_BYTES.replace(b"\n", b"\r\n"),
+            _SOFT_BREAK_MHTML_BYTES,
+            _SOFT_BREAK_MHTML_BYTES.replace(b"\n", b"\r\n"),
+        ],
+        ids=["lf", "crlf", "lf-soft-break", "crlf-soft-break"],
+    )
+    def test_leading_html_part_matches_email_module(self, data):
+        msg = email.message_from_bytes(data, policy=email.policy.default)
+        html_part = next(p for p in msg.walk() if p.get_content_type() == "text/html")
+        expected = html_part.get_payload(decode=True).decode("utf-8")
+        assert _leading_html_part(data) == expected
+
+    def test_html_not_first_falls_back(self, tmp_path):
+        msg = email.mime.multipart.MIMEMultipart("related")
+        msg.attach(email.mime.text.MIMEText("not the page", "plain", "utf-8"))
+        msg.attach(email.mime.text.MIMEText(_SAMPLE_HTML, "html", "utf-8"))
+        data = msg.as_bytes()
+        assert _leading_html_part(data) is None
+
+        path = tmp_path / "reordered.mhtml"
+        path.write_bytes(data)
+        result = parse_test_result_mhtml(str(path))
+        assert result.test_name == "TEMPUS XF"
+        assert len(result.variants) == 2
+
     def test_parse_nonexistent_file(self):
         with pytest.raises(FileNotFoundError):
             parse_test_result_mhtml("/nonexistent/file.mhtml")
@@ -404,11 +418,23 @@ class TestVafParsing:
     def test_parse_non_numeric(self):
         assert _parse_vaf("N/A") is None
 
+    def test_parse_mixed_inputs(self):
+        raws = ["53.2%", "N/A", "", "0.7 %", "1.2.3%"]
+        assert [_parse_vaf(r) for r in raws] == [53.2, None, None, 0.7, None]
+
+
+def _labs_by_test_name(records) -> dict[str, list]:
+    """Group an adapter's lab results by exact test name."""
+    index: dict[str, list] = {}
+    for lr in records.lab_results:
+        index.setdefault(lr.test_name, []).append(lr)
+    return index
+
 
 class TestTestResultAdapter:
     def test_creates_tmb_lab_result(self, sample_parsed):
         records = adapt_test_result(sample_parsed)
-        tmb = [lr for lr in records.lab_results if "Tumor" in lr.test_name]
+        tmb = _labs_by_test_name(records)["Tumor Mutational Burden"]
         assert len(tmb) == 1
         assert tmb[0].value == "2.2"
         assert tmb[0].value_numeric == 2.2
@@ -416,14 +442,14 @@ class TestTestResultAdapter:
 
     def test_creates_msi_lab_result(self, sample_parsed):
         records = adapt_test_result(sample_parsed)
-        msi = [lr for lr in records.lab_results if "Microsatellite" in lr.test_name]
+        msi = _labs_by_test_name(records)["Microsatellite Instability"]
         assert len(msi) == 1
         assert msi[0].value == "MSI-High not detected"
         assert msi[0].value_numeric is None
 
     def test_creates_interpretation_lab_result(self, sample_parsed):
         records = adapt_test_result(sample_parsed)
-        interp = [lr for lr in records.lab_results if "Interpretation" in lr.test_name]
+        interp = _labs_by_test_name(records)["Genomic Panel Interpretation"]
         assert len(interp) == 1
         assert interp[0].value == "inconclusive"
 
@@ -483,68 +509,50 @@ class TestTestResultAdapter:
 
 
 class TestTestResultDbIntegration:
-    def test_load_and_query(self, tmp_path, sample_parsed):
-        db = ChartfoldDB(str(tmp_path / "test.db"))
-        db.init_schema()
-
+    def test_load_and_query(self, memory_db, sample_parsed):
         records = adapt_test_result(sample_parsed)
-        result = db.load_source(records, replace=False)
+        result = memory_db.load_source(records, replace=False)
 
         assert result["lab_results"] == 3
         assert result["genetic_variants"] == 2
 
         # Query back
-        variants = db.query("SELECT gene, classification, vaf FROM genetic_variants ORDER BY gene")
+        variants = memory_db.query("SELECT gene, classification, vaf FROM genetic_variants ORDER BY gene")
         assert len(variants) == 2
         assert variants[0]["gene"] == "ABCC3"
         assert variants[0]["vaf"] == 53.2
         assert variants[1]["gene"] == "TP53"
 
-        labs = db.query("SELECT test_name, value FROM lab_results WHERE source='mychart_tempus' ORDER BY test_name")
+        labs = memory_db.query("SELECT test_name, value FROM lab_results WHERE source='mychart_tempus' ORDER BY test_name")
         assert len(labs) == 3
 
-        db.close()
-
-    def test_upsert_idempotent(self, tmp_path, sample_parsed):
+    def test_upsert_idempotent(self, memory_db, sample_parsed):
         """Loading the same data twice should skip on second load."""
-        db = ChartfoldDB(str(tmp_path / "test.db"))
-        db.init_schema()
-
         records = adapt_test_result(sample_parsed)
-        db.load_source(records, replace=False)
-        result2 = db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
+        result2 = memory_db.load_source(records, replace=False)
 
         assert result2["skipped"] is True
 
         # DB should have exactly the same counts
-        variants = db.query("SELECT COUNT(*) as n FROM genetic_variants")
+        variants = memory_db.query("SELECT COUNT(*) as n FROM genetic_variants")
         assert variants[0]["n"] == 2
 
-        db.close()
-
-    def test_load_log_records_genetic_variants(self, tmp_path, sample_parsed):
+    def test_load_log_records_genetic_variants(self, memory_db, sample_parsed):
         """Load log should include genetic_variants_count."""
-        db = ChartfoldDB(str(tmp_path / "test.db"))
-        db.init_schema()
-
         records = adapt_test_result(sample_parsed)
-        db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
-        log = db.query("SELECT genetic_variants_count FROM load_log ORDER BY id DESC LIMIT 1")
+        log = memory_db.query("SELECT genetic_variants_count FROM load_log ORDER BY id DESC LIMIT 1")
         assert log[0]["genetic_variants_count"] == 2
 
-        db.close()
-
-    def test_cross_source_coexistence(self, tmp_path, sample_parsed):
+    def test_cross_source_coexistence(self, memory_db, sample_parsed):
         """Test-result data should coexist with other sources."""
         from chartfold.models import LabResult, UnifiedRecords
 
-        db = ChartfoldDB(str(tmp_path / "test.db"))
-        db.init_schema()
-
         # Load test-result data
         records = adapt_test_result(sample_parsed)
-        db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
         # Load some other source data
         other = UnifiedRecords(
@@ -553,27 +561,20 @@ class TestTestResultDbIntegration:
                 LabResult(source="epic", test_name="CEA", value="5.8", value_numeric=5.8, result_date="2025-07-10"),
             ],
         )
-        db.load_source(other, replace=False)
+        memory_db.load_source(other, replace=False)
 
         # Both should be present
-        all_labs = db.query("SELECT COUNT(*) as n FROM lab_results")
+        all_labs = memory_db.query("SELECT COUNT(*) as n FROM lab_results")
         assert all_labs[0]["n"] == 4  # 3 from tempus + 1 from epic
 
-        variants = db.query("SELECT COUNT(*) as n FROM genetic_variants")
+        variants = memory_db.query("SELECT COUNT(*) as n FROM genetic_variants")
         assert variants[0]["n"] == 2  # Only from tempus
 
-        db.close()
-
-    def test_last_load_counts_includes_genetic_variants(self, tmp_path, sample_parsed):
+    def test_last_load_counts_includes_genetic_variants(self, memory_db, sample_parsed):
         """last_load_counts should include genetic_variants."""
-        db = ChartfoldDB(str(tmp_path / "test.db"))
-        db.init_schema()
-
         records = adapt_test_result(sample_parsed)
-        db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
-        counts = db.last_load_counts("mychart_tempus")
+        counts = memory_db.last_load_counts("mychart_tempus")
         assert counts is not None
         assert counts["genetic_variants"] == 2
-
-        db.close()
@@ -1,22 +1,19 @@
 """Tests for MyChart MHTML parser and adapter."""
 
 import base64
-import email
-import email.mime.image
-import email.mime.multipart
-import email.mime.text
+import hashlib
 import quopri
 from pathlib import Path
 
 import pytest
 
 from chartfold.adapters.mhtml_visit_adapter import (
+    _content_hash,
     _infer_modality,
     _parser_counts,
     mychart_to_unified,
     save_images,
 )
-from chartfold.db import ChartfoldDB
 from chartfold.sources.mhtml_visit import (
     ParsedVisit,
     StudyRef,
@@ -30,6 +27,9 @@ from chartfold.sources.mhtml_visit import (
 # --- Fixtures ---
 
 
+_BOUNDARY = "chartfold-test-boundary"
+
+
 def _make_mhtml(html_body: str, images: dict[str, bytes] | None = None) -> bytes:
     """Build a minimal MHTML file for testing.
 
@@ -37,28 +37,27 @@ def _make_mhtml(html_body: str, images: dict[str, bytes] | None = None) -> bytes
         html_body: The HTML content (will be quoted-printable encoded).
         images: Dict of UUID -> image bytes to include as MIME parts.
     """
-    msg = email.mime.multipart.MIMEMultipart("related")
-    msg["Subject"] = "MyChart - Past Visit Details"
-    msg["MIME-Version"] = "1.0"
-
-    # HTML part
-    html_part = email.mime.text.MIMEText(html_body, "html", "utf-8")
-    html_part.replace_header("Content-Transfer-Encoding", "quoted-printable")
-    # Re-encode as QP
-    html_bytes = html_body.encode("utf-8")
-    html_part.set_payload(quopri.encodestring(html_bytes).decode("ascii"))
-    msg.attach(html_part)
-
-    # Image parts
+    qp_html = quopri.encodestring(html_body.encode("utf-8")).decode("ascii")
+    parts = [
+        "Subject: MyChart - Past Visit Details\n"
+        "MIME-Version: 1.0\n"
+        f'Content-Type: multipart/related; boundary="{_BOUNDARY}"\n',
+        f"--{_BOUNDARY}\n"
+        'Content-Type: text/html; charset="utf-8"\n'
+        "Content-Transfer-Encoding: quoted-printable\n\n"
+        f"{qp_html}",
+    ]
     for uuid, data in (images or {}).items():
-        img_part = email.mime.image.MIMEImage(data, "png")
-        img_part.add_header(
-            "Content-Location",
-            f"https://www.mypatientchart.org/MyChart/Image/Load?fileName={uuid}",
+        parts.append(
+            f"--{_BOUNDARY}\n"
+            "Content-Type: image/png\n"
+            "Content-Transfer-Encoding: base64\n"
+            "Content-Location: https://www.mypatientchart.org/MyChart/Image/Load"
+            f"?fileName={uuid}\n\n"
+            f"{base64.encodebytes(data).decode('ascii')}"
         )
-        msg.attach(img_part)
-
-    return msg.as_bytes()
+    parts.append(f"--{_BOUNDARY}--\n")
+    return "\n".join(parts).encode("ascii")
 
 
 # Two distinct tiny valid 1x1 PNGs (different pixels → different content hash)
@@ -71,6 +70,9 @@ _TINY_PNG_2 = base64.b64decode(
     "nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC"
 )
 
+_TINY_PNG_HASH = hashlib.sha256(_TINY_PNG).hexdigest()[:16]
+_TINY_PNG_2_HASH = hashlib.sha256(_TINY_PNG_2).hexdigest()[:16]
+
 _SAMPLE_HTML = """<!DOCTYPE html>
 <html>
 <head><title>MyChart - Past Visit Details</title></head>
@@ -95,25 +97,35 @@ _SAMPLE_HTML = """<!DOCTYPE html>
 </html>"""
 
 
-@pytest.fixture
-def sample_mhtml(tmp_path):
+_SAMPLE_IMAGES = {
+    "aaa11111-2222-3333-4444-555566667777": _TINY_PNG,
+    "bbb22222-3333-4444-5555-666677778888": _TINY_PNG_2,
+}
+# Deterministic, so build the MIME documents once at import
+_SAMPLE_MHTML_BYTES = _make_mhtml(_SAMPLE_HTML, _SAMPLE_IMAGES)
+_SAMPLE_MHTML_NO_IMAGES_BYTES = _make_mhtml(_SAMPLE_HTML, images={})
+
+
+@pytest.fixture(scope="module")
+def sample_mhtml(tmp_path_factory):
     """Create a sample MHTML file with visit data and images."""
-    images = {
-        "aaa11111-2222-3333-4444-555566667777": _TINY_PNG,
-        "bbb22222-3333-4444-5555-666677778888": _TINY_PNG_2,
-    }
-    mhtml_bytes = _make_mhtml(_SAMPLE_HTML, images)
-    mhtml_path = tmp_path / "visit.mhtml"
-    mhtml_path.write_bytes(mhtml_bytes)
+    mhtml_path = tmp_path_factory.mktemp("mhtml") / "visit.mhtml"
+    mhtml_path.write_bytes(_SAMPLE_MHTML_BYTES)
     return str(mhtml_path)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def parsed_visit(sample_mhtml):
-    """Parse the sample MHTML file."""
+    """Parse the sample MHTML file once; the adapter never mutates it."""
     return parse_mhtml(sample_mhtml)
 
 
+@pytest.fixture(scope="module")
+def mychart_records(parsed_visit):
+    """Adapt the sample visit once for the read-only adapter tests."""
+    return mychart_to_unified(parsed_visit, source="mychart")
+
+
 # --- Unit tests for helpers ---
 
 
@@ -133,12 +145,31 @@ class TestHelpers:
     def test_parse_display_date_full_month(self):
         assert _parse_display_date("January 15, 2026") == "2026-01-15"
 
-    def test_extract_uuid_from_url(self):
-        url = "https://www.mypatientchart.org/MyChart/Image/Load?fileName=aaa11111-2222-3333-4444-555566667777"
-        assert _extract_uuid_from_url(url) == "aaa11111-2222-3333-4444-555566667777"
-
-    def test_extract_uuid_from_url_no_match(self):
-        assert _extract_uuid_from_url("https://example.com/foo") == ""
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            (
+                "https://www.mypatientchart.org/MyChart/Image/Load?fileName=aaa11111-2222-3333-4444-555566667777",
+                "aaa11111-2222-3333-4444-555566667777",
+            ),
+            # Extra query parameters after the UUID
+            (
+                "/MyChart/Image/Load?fileName=bbb22222-3333-4444-5555-666677778888&w=576",
+                "bbb22222-3333-4444-5555-666677778888",
+            ),
+            # First fileName= is not a UUID; a later one is
+            (
+                "/Load?fileName=logo.png&next=/Load?fileName=aaa11111-2222-3333-4444-555566667777",
+                "aaa11111-2222-3333-4444-555566667777",
+            ),
+            ("https://example.com/foo", ""),
+            ("/MyChart/Image/Load?fileName=short-id", ""),
+            ("", ""),
+        ],
+        ids=["plain", "trailing_query", "later_match", "no_marker", "not_uuid", "empty"],
+    )
+    def test_extract_uuid_from_url(self, url, expected):
+        assert _extract_uuid_from_url(url) == expected
 
     def test_infer_modality_mri(self):
         assert _infer_modality("MRI Abdomen Pelvis") == "MRI"
@@ -212,19 +243,20 @@ class TestMhtmlParser:
 
     def test_empty_mhtml(self, tmp_path):
         """MHTML with no HTML body should return empty ParsedVisit."""
-        msg = email.mime.multipart.MIMEMultipart("related")
-        msg["Subject"] = "Test"
         path = tmp_path / "empty.mhtml"
-        path.write_bytes(msg.as_bytes())
+        path.write_text(
+            "Subject: Test\n"
+            f'Content-Type: multipart/related; boundary="{_BOUNDARY}"\n\n'
+            f"--{_BOUNDARY}--\n"
+        )
         result = parse_mhtml(str(path))
         assert result.visit_date == ""
         assert result.images == {}
 
     def test_mhtml_without_images(self, tmp_path):
         """MHTML with HTML but no image parts."""
-        mhtml_bytes = _make_mhtml(_SAMPLE_HTML, images={})
         path = tmp_path / "noimg.mhtml"
-        path.write_bytes(mhtml_bytes)
+        path.write_bytes(_SAMPLE_MHTML_NO_IMAGES_BYTES)
         result = parse_mhtml(str(path))
         assert result.visit_date == "2026-02-05"
         assert len(result.images) == 0
@@ -236,33 +268,29 @@ class TestMhtmlParser:
 
 
 class TestMychartAdapter:
-    def test_creates_encounter(self, parsed_visit):
-        records = mychart_to_unified(parsed_visit, source="mychart")
-        assert len(records.encounters) == 1
-        enc = records.encounters[0]
+    def test_creates_encounter(self, mychart_records):
+        assert len(mychart_records.encounters) == 1
+        enc = mychart_records.encounters[0]
         assert enc.encounter_date == "2026-02-05"
         assert enc.encounter_type == "Office Visit"
         assert enc.provider == "Benjamin Tan, MD"
         assert enc.facility == "WashU Medicine Oncology"
 
-    def test_creates_clinical_note(self, parsed_visit):
-        records = mychart_to_unified(parsed_visit, source="mychart")
-        assert len(records.clinical_notes) == 1
-        note = records.clinical_notes[0]
+    def test_creates_clinical_note(self, mychart_records):
+        assert len(mychart_records.clinical_notes) == 1
+        note = mychart_records.clinical_notes[0]
         assert note.note_date == "2026-02-05"
         assert note.author == "Benjamin Tan, MD"
         assert "RADIOLOGY REVIEW:" in note.content
 
-    def test_creates_imaging_reports(self, parsed_visit):
-        records = mychart_to_unified(parsed_visit, source="mychart")
-        assert len(records.imaging_reports) >= 2
-        names = {r.study_name for r in records.imaging_reports}
+    def test_creates_imaging_reports(self, mychart_records):
+        assert len(mychart_records.imaging_reports) >= 2
+        names = {r.study_name for r in mychart_records.imaging_reports}
         assert "MRI/CT" in names
         assert "PET/FDG" in names
 
-    def test_imaging_report_modalities(self, parsed_visit):
-        records = mychart_to_unified(parsed_visit, source="mychart")
-        modalities = {r.study_name: r.modality for r in records.imaging_reports}
+    def test_imaging_report_modalities(self, mychart_records):
+        modalities = {r.study_name: r.modality for r in mychart_records.imaging_reports}
         assert modalities["MRI/CT"] == "MRI"
         assert modalities["PET/FDG"] == "PET"
 
@@ -275,15 +303,16 @@ class TestMychartAdapter:
             assert asset.file_path.startswith("/tmp/img/")
             assert asset.encounter_date == "2026-02-05"
 
-    def test_asset_filenames_are_content_hashes(self, parsed_visit):
+    def test_asset_filenames_are_content_hashes(self, mychart_records):
         """Filenames should be content hashes, not UUIDs."""
-        records = mychart_to_unified(parsed_visit, source="mychart")
-        for asset in records.source_assets:
-            # Content hash: 16 hex chars + .png
-            assert len(asset.file_name) == 20  # 16 hex + ".png"
-            assert asset.file_name.endswith(".png")
-            # Should NOT be a UUID pattern
-            assert "-" not in asset.file_name
+        names = {asset.file_name for asset in mychart_records.source_assets}
+        assert names == {f"{_TINY_PNG_HASH}.png", f"{_TINY_PNG_2_HASH}.png"}
+
+    def test_content_hash_is_stable(self):
+        """Asset file names are persisted and used for cross-visit dedup, so
+        the naming scheme must not change between releases."""
+        assert _content_hash(_TINY_PNG) == "57d26c211dc3aec4"
+        assert _content_hash(_TINY_PNG) == _TINY_PNG_HASH
 
     def test_duplicate_image_content_deduped(self):
         """Two UUIDs with identical bytes should produce one asset."""
@@ -296,6 +325,7 @@ class TestMychartAdapter:
         )
         records = mychart_to_unified(visit, source="mychart")
         assert len(records.source_assets) == 1
+        assert records.source_assets[0].file_name == f"{_TINY_PNG_HASH}.png"
 
     def test_different_image_content_kept(self):
         """Two UUIDs with different bytes should produce two assets."""
@@ -345,6 +375,8 @@ class TestMychartAdapter:
         # But two UUIDs should point to the same file
         paths = set(saved.values())
         assert len(paths) == 2  # Only 2 unique files on disk
+        assert saved["uuid-aaaa"] == saved["uuid-bbbb"]
+        assert Path(saved["uuid-aaaa"]).name == f"{_TINY_PNG_HASH}.png"
 
     def test_empty_visit(self):
         """Empty ParsedVisit should produce empty UnifiedRecords."""
@@ -360,7 +392,7 @@ class TestMychartAdapter:
 
 
 class TestMychartDbIntegration:
-    def test_granular_load_does_not_delete(self, tmp_db, parsed_visit):
+    def test_granular_load_does_not_delete(self, memory_db, parsed_visit):
         """replace=False should not affect existing data from other sources."""
         from chartfold.models import ImagingReport, UnifiedRecords
 
@@ -377,40 +409,44 @@ class TestMychartDbIntegration:
                 ),
             ],
         )
-        tmp_db.load_source(epic)
+        memory_db.load_source(epic)
 
         # Now load mychart data (granular)
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
-        tmp_db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
         # Both sources should coexist
-        all_imaging = tmp_db.query("SELECT * FROM imaging_reports ORDER BY source")
+        all_imaging = memory_db.query("SELECT * FROM imaging_reports ORDER BY source")
         sources = {r["source"] for r in all_imaging}
         assert "epic" in sources
         assert "mychart" in sources
 
-    def test_reimport_updates_not_duplicates(self, tmp_db, parsed_visit):
+    def test_reimport_updates_not_duplicates(self, memory_db, parsed_visit):
         """Loading same MHTML twice with replace=False should update, not duplicate."""
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
 
-        tmp_db.load_source(records, replace=False)
-        count_first = len(tmp_db.query("SELECT * FROM imaging_reports WHERE source='mychart'"))
+        memory_db.load_source(records, replace=False)
+        count_first = memory_db.query(
+            "SELECT COUNT(*) as n FROM imaging_reports WHERE source='mychart'"
+        )[0]["n"]
 
-        tmp_db.load_source(records, replace=False)
-        count_second = len(tmp_db.query("SELECT * FROM imaging_reports WHERE source='mychart'"))
+        memory_db.load_source(records, replace=False)
+        count_second = memory_db.query(
+            "SELECT COUNT(*) as n FROM imaging_reports WHERE source='mychart'"
+        )[0]["n"]
 
         assert count_first == count_second
 
-    def test_load_creates_load_log(self, tmp_db, parsed_visit):
+    def test_load_creates_load_log(self, memory_db, parsed_visit):
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
-        tmp_db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
-        logs = tmp_db.query("SELECT * FROM load_log WHERE source='mychart'")
+        logs = memory_db.query("SELECT * FROM load_log WHERE source='mychart'")
         assert len(logs) == 1
         assert logs[0]["imaging_reports_count"] >= 2
         assert logs[0]["source_assets_count"] == 2
 
-    def test_cross_visit_image_dedup(self, tmp_db):
+    def test_cross_visit_image_dedup(self, memory_db):
         """Same image in two visit pages should not produce duplicate assets."""
         # Visit 1: has image A and image B
         visit1 = ParsedVisit(
@@ -450,51 +486,51 @@ class TestMychartDbIntegration:
         records1 = mychart_to_unified(visit1, source="mychart")
         records2 = mychart_to_unified(visit2, source="mychart")
 
-        tmp_db.load_source(records1, replace=False)
-        tmp_db.load_source(records2, replace=False)
+        memory_db.load_source(records1, replace=False)
+        memory_db.load_source(records2, replace=False)
 
         # Should only have 2 unique assets, not 4
-        assets = tmp_db.query("SELECT * FROM source_assets WHERE source='mychart'")
-        assert len(assets) == 2
+        assets = memory_db.query("SELECT COUNT(*) as n FROM source_assets WHERE source='mychart'")
+        assert assets[0]["n"] == 2
 
 
 # --- Post-load linking tests ---
 
 
 class TestPostLoadLinking:
-    def test_links_assets_to_imaging_reports(self, tmp_db, parsed_visit):
+    def test_links_assets_to_imaging_reports(self, memory_db, parsed_visit):
         """_link_assets_to_imaging should set ref_table/ref_id on source_assets."""
         from chartfold.cli import _link_assets_to_imaging
 
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
-        tmp_db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
         # Before linking: assets have no ref_table/ref_id
-        assets_before = tmp_db.query(
+        assets_before = memory_db.query(
             "SELECT ref_table, ref_id FROM source_assets WHERE source='mychart'"
         )
         assert all(not a["ref_table"] for a in assets_before)
 
-        linked = _link_assets_to_imaging(tmp_db, "mychart")
+        linked = _link_assets_to_imaging(memory_db, "mychart")
         assert linked == 2  # Two images, each linked to a study
 
         # After linking: assets should point to imaging_reports
-        assets_after = tmp_db.query(
+        assets_after = memory_db.query(
             "SELECT ref_table, ref_id FROM source_assets WHERE source='mychart'"
         )
         assert all(a["ref_table"] == "imaging_reports" for a in assets_after)
         assert all(a["ref_id"] is not None for a in assets_after)
 
-    def test_linked_ref_ids_match_correct_reports(self, tmp_db, parsed_visit):
+    def test_linked_ref_ids_match_correct_reports(self, memory_db, parsed_visit):
         """ref_id should point to the correct imaging_report by study_name."""
         from chartfold.cli import _link_assets_to_imaging
 
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
-        tmp_db.load_source(records, replace=False)
-        _link_assets_to_imaging(tmp_db, "mychart")
+        memory_db.load_source(records, replace=False)
+        _link_assets_to_imaging(memory_db, "mychart")
 
         # Get the linked assets with their report info
-        linked = tmp_db.query(
+        linked = memory_db.query(
             """
             SELECT sa.file_name, ir.study_name, ir.study_date
             FROM source_assets sa
@@ -506,21 +542,21 @@ class TestPostLoadLinking:
         assert "MRI/CT" in study_names
         assert "PET/FDG" in study_names
 
-    def test_idempotent_linking(self, tmp_db, parsed_visit):
+    def test_idempotent_linking(self, memory_db, parsed_visit):
         """Running _link_assets_to_imaging twice should not change anything."""
         from chartfold.cli import _link_assets_to_imaging
 
         records = mychart_to_unified(parsed_visit, source="mychart", image_dir="/tmp")
-        tmp_db.load_source(records, replace=False)
+        memory_db.load_source(records, replace=False)
 
-        linked_first = _link_assets_to_imaging(tmp_db, "mychart")
+        linked_first = _link_assets_to_imaging(memory_db, "mychart")
         assert linked_first == 2
 
         # Second run: already linked, should find nothing new
-        linked_second = _link_assets_to_imaging(tmp_db, "mychart")
+        linked_second = _link_assets_to_imaging(memory_db, "mychart")
         assert linked_second == 0
 
-    def test_no_linking_without_imaging_reports(self, tmp_db):
+    def test_no_linking_without_imaging_reports(self, memory_db):
         """Assets without matching imaging_reports should not be linked."""
         from chartfold.cli import _link_assets_to_imaging
         from chartfold.models import SourceAsset, UnifiedRecords
@@ -537,8 +573,8 @@ class TestPostLoadLinking:
                 ),
             ],
         )
-        tmp_db.load_source(records, replace=False)
-        linked = _link_assets_to_imaging(tmp_db, "mychart")
+        memory_db.load_source(records, replace=False)
+        linked = _link_assets_to_imaging(memory_db, "mychart")
         assert linked == 0
 
 
@@ -546,19 +582,16 @@ class TestPostLoadLinking:
 
 
 class TestAutoDetectMhtml:
-    def test_auto_loads_mhtml_file(self, tmp_path, sample_mhtml):
+    def test_auto_loads_mhtml_file(self, memory_db, sample_mhtml):
         """chartfold load auto <file.mhtml> should auto-detect and load mychart."""
         from chartfold.cli import _load_auto
 
-        db_path = str(tmp_path / "test.db")
-        with ChartfoldDB(db_path) as db:
-            db.init_schema()
-            _load_auto(db, sample_mhtml)
-
-            # Should have loaded encounter + imaging reports + assets
-            encounters = db.query("SELECT * FROM encounters WHERE source='mychart'")
-            assert len(encounters) == 1
-            imaging = db.query("SELECT * FROM imaging_reports WHERE source='mychart'")
-            assert len(imaging) >= 2
-            assets = db.query("SELECT * FROM source_assets WHERE source='mychart'")
-            assert len(assets) == 2
+        _load_auto(memory_db, sample_mhtml)
+
+        # Should have loaded encounter + imaging reports + assets
+        encounters = memory_db.query("SELECT * FROM encounters WHERE source='mychart'")
+        assert len(encounters) == 1
+        imaging = memory_db.query("SELECT * FROM imaging_reports WHERE source='mychart'")
+        assert len(imaging) >= 2
+        assets = memory_db.query("SELECT * FROM source_assets WHERE source='mychart'")
+        assert len(assets) == 2
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from dataclasses import asdict
-from typing import ClassVar
+from dataclasses import fields as dc_fields
+
+import pytest
 
 from chartfold.models import (
     AllergyRecord,
@@ -27,87 +29,97 @@ from chartfold.models import (
 )
 
 
-class TestDataclassInstantiation:
-    """Verify all dataclasses can be instantiated with minimal args."""
-
-    def test_patient_record(self):
-        p = PatientRecord(source="test")
-        assert p.source == "test"
-        assert p.name == ""
-        assert p.gender == ""
-
-    def test_document_record(self):
-        d = DocumentRecord(source="test", doc_id="DOC001")
-        assert d.doc_id == "DOC001"
-        assert d.doc_type == ""
-
-    def test_encounter_record(self):
-        e = EncounterRecord(source="test")
-        assert e.encounter_type == ""
-
-    def test_lab_result(self):
-        lr = LabResult(source="test", test_name="CEA", value="5.8", value_numeric=5.8)
-        assert lr.value_numeric == 5.8
-        assert lr.unit == ""
-
-    def test_lab_result_null_numeric(self):
-        lr = LabResult(source="test", test_name="Culture", value="positive")
-        assert lr.value_numeric is None
-
-    def test_vital_record(self):
-        v = VitalRecord(source="test", vital_type="bp_systolic", value=120.0)
-        assert v.value == 120.0
-
-    def test_medication_record(self):
-        m = MedicationRecord(source="test", name="Aspirin")
-        assert m.status == ""
-
-    def test_condition_record(self):
-        c = ConditionRecord(source="test", condition_name="Diabetes")
-        assert c.icd10_code == ""
-
-    def test_procedure_record(self):
-        p = ProcedureRecord(source="test", name="Colonoscopy")
-        assert p.cpt_code == ""
-
-    def test_pathology_report(self):
-        pr = PathologyReport(source="test", diagnosis="Adenocarcinoma")
-        assert pr.procedure_id is None
-
-    def test_imaging_report(self):
-        ir = ImagingReport(source="test", study_name="CT Chest")
-        assert ir.modality == ""
-
-    def test_clinical_note(self):
-        cn = ClinicalNote(source="test", content="Patient doing well.")
-        assert cn.content_format == "text"
-
-    def test_immunization_record(self):
-        i = ImmunizationRecord(source="test", vaccine_name="Flu")
-        assert i.cvx_code == ""
-
-    def test_allergy_record(self):
-        a = AllergyRecord(source="test", allergen="Penicillin")
-        assert a.severity == ""
+CLINICAL_TYPES = [
+    PatientRecord,
+    DocumentRecord,
+    EncounterRecord,
+    LabResult,
+    VitalRecord,
+    MedicationRecord,
+    ConditionRecord,
+    ProcedureRecord,
+    PathologyReport,
+    ImagingReport,
+    ClinicalNote,
+    ImmunizationRecord,
+    AllergyRecord,
+    SocialHistoryRecord,
+    FamilyHistoryRecord,
+    MentalStatusRecord,
+    GeneticVariant,
+]
+_FIELD_NAMES = {cls: {f.name for f in dc_fields(cls)} for cls in CLINICAL_TYPES}
+
+# (cls, constructor kwargs, field, expected value)
+_DATACLASS_CASES = [
+    (PatientRecord, {"source": "test"}, "source", "test"),
+    (PatientRecord, {"source": "test"}, "name", ""),
+    (PatientRecord, {"source": "test"}, "gender", ""),
+    (DocumentRecord, {"source": "test", "doc_id": "DOC001"}, "doc_id", "DOC001"),
+    (DocumentRecord, {"source": "test", "doc_id": "DOC001"}, "doc_type", ""),
+    (EncounterRecord, {"source": "test"}, "encounter_type", ""),
+    (
+        LabResult,
+        {"source": "test", "test_name": "CEA", "value": "5.8", "value_numeric": 5.8},
+        "value_numeric",
+        5.8,
+    ),
+    (LabResult, {"source": "test", "test_name": "CEA", "value": "5.8"}, "unit", ""),
+    (
+        LabResult,
+        {"source": "test", "test_name": "Culture", "value": "positive"},
+        "value_numeric",
+        None,
+    ),
+    (VitalRecord, {"source": "test", "vital_type": "bp_systolic", "value": 120.0}, "value", 120.0),
+    (MedicationRecord, {"source": "test", "name": "Aspirin"}, "status", ""),
+    (ConditionRecord, {"source": "test", "condition_name": "Diabetes"}, "icd10_code", ""),
+    (ProcedureRecord, {"source": "test", "name": "Colonoscopy"}, "cpt_code", ""),
+    (PathologyReport, {"source": "test", "diagnosis": "Adenocarcinoma"}, "procedure_id", None),
+    (ImagingReport, {"source": "test", "study_name": "CT Chest"}, "modality", ""),
+    (ClinicalNote, {"source": "test", "content": "Patient doing well."}, "content_format", "text"),
+    (ImmunizationRecord, {"source": "test", "vaccine_name": "Flu"}, "cvx_code", ""),
+    (AllergyRecord, {"source": "test", "allergen": "Penicillin"}, "severity", ""),
+    (
+        SocialHistoryRecord,
+        {"source": "test", "category": "smoking", "value": "never"},
+        "recorded_date",
+        "",
+    ),
+    (
+        FamilyHistoryRecord,
+        {"source": "test", "relation": "father", "condition": "heart disease"},
+        "deceased",
+        None,
+    ),
+    (MentalStatusRecord, {"source": "test", "instrument": "PHQ-9"}, "score", None),
+    (MentalStatusRecord, {"source": "test", "instrument": "PHQ-9"}, "total_score", None),
+    (GeneticVariant, {"source": "test", "gene": "TP53", "dna_change": "c.713G>A"}, "gene", "TP53"),
+    (GeneticVariant, {"source": "test", "gene": "TP53", "dna_change": "c.713G>A"}, "vaf", None),
+    (
+        GeneticVariant,
+        {"source": "test", "gene": "TP53", "dna_change": "c.713G>A"},
+        "classification",
+        "",
+    ),
+]
 
-    def test_social_history_record(self):
-        sh = SocialHistoryRecord(source="test", category="smoking", value="never")
-        assert sh.recorded_date == ""
 
-    def test_family_history_record(self):
-        fh = FamilyHistoryRecord(source="test", relation="father", condition="heart disease")
-        assert fh.deceased is None
+class TestDataclassInstantiation:
+    """Verify all dataclasses can be instantiated with minimal args."""
 
-    def test_mental_status_record(self):
-        ms = MentalStatusRecord(source="test", instrument="PHQ-9")
-        assert ms.score is None
-        assert ms.total_score is None
+    @pytest.mark.parametrize(
+        ("cls", "kwargs", "field", "expected"),
+        _DATACLASS_CASES,
+        ids=[f"{case[0].__name__}.{case[2]}" for case in _DATACLASS_CASES],
+    )
+    def test_dataclass_field(self, cls, kwargs, field, expected):
+        obj = cls(**kwargs)
+        assert getattr(obj, field) == expected
 
-    def test_genetic_variant(self):
-        gv = GeneticVariant(source="test", gene="TP53", dna_change="c.713G>A")
-        assert gv.gene == "TP53"
-        assert gv.vaf is None
-        assert gv.classification == ""
+    @pytest.mark.parametrize("cls", CLINICAL_TYPES, ids=lambda cls: cls.__name__)
+    def test_record_is_slotted(self, cls):
+        assert "__slots__" in vars(cls)
 
 
 class TestUnifiedRecords:
@@ -143,33 +155,9 @@ class TestUnifiedRecords:
 class TestMetadataField:
     """All clinical record dataclasses should have a metadata field."""
 
-    CLINICAL_TYPES: ClassVar[list] = [
-        PatientRecord,
-        DocumentRecord,
-        EncounterRecord,
-        LabResult,
-        VitalRecord,
-        MedicationRecord,
-        ConditionRecord,
-        ProcedureRecord,
-        PathologyReport,
-        ImagingReport,
-        ClinicalNote,
-        ImmunizationRecord,
-        AllergyRecord,
-        SocialHistoryRecord,
-        FamilyHistoryRecord,
-        MentalStatusRecord,
-        GeneticVariant,
-    ]
-
-    def test_all_types_have_metadata_field(self):
-        """Every clinical record type should have a metadata field."""
-        from dataclasses import fields as dc_fields
-
-        for cls in self.CLINICAL_TYPES:
-            field_names = {f.name for f in dc_fields(cls)}
-            assert "metadata" in field_names, f"{cls.__name__} missing metadata field"
+    @pytest.mark.parametrize("cls", CLINICAL_TYPES, ids=lambda cls: cls.__name__)
+    def test_has_metadata_field(self, cls):
+        assert "metadata" in _FIELD_NAMES[cls], f"{cls.__name__} missing metadata field"
 
     def test_metadata_defaults_to_empty_string(self):
         """Metadata should default to empty string (not None)."""
@@ -2,6 +2,7 @@
 
 import base64
 
+import pytest
 
 from chartfold.core.fhir import decode_presented_form
 from chartfold.extractors.pathology import (
@@ -11,52 +12,60 @@ from chartfold.extractors.pathology import (
     parse_pathology_sections,
 )
 
+_PLAIN_B64 = base64.b64encode(b"Diagnosis: Adenocarcinoma, invasive.").decode()
+_HTML_B64 = base64.b64encode(
+    b"<html><body><p>Diagnosis: <b>Adenocarcinoma</b></p></body></html>"
+).decode()
+
+_REPORT_TEXT = """
+        SURGICAL PATHOLOGY REPORT
+        Diagnosis: Invasive adenocarcinoma of the colon, moderately differentiated.
+        pT4aN1a, 6/23 lymph nodes positive.
+        Gross Description: Sigmoid colon segment, 30 cm in length.
+        Microscopic Description: Tumor invades through muscularis propria.
+        """
+
 
 class TestDecodePresented:
     def test_decode_plain_text(self):
-        text = "Diagnosis: Adenocarcinoma, invasive."
-        b64 = base64.b64encode(text.encode()).decode()
-        result = decode_presented_form(b64, "text/plain")
+        result = decode_presented_form(_PLAIN_B64, "text/plain")
         assert "Adenocarcinoma" in result
 
     def test_decode_html(self):
-        html = "<html><body><p>Diagnosis: <b>Adenocarcinoma</b></p></body></html>"
-        b64 = base64.b64encode(html.encode()).decode()
-        result = decode_presented_form(b64, "text/html")
+        result = decode_presented_form(_HTML_B64, "text/html")
         assert "Adenocarcinoma" in result
         assert "<b>" not in result
 
+    def test_decode_bytes_payload(self):
+        result = decode_presented_form(_PLAIN_B64.encode(), "text/plain")
+        assert result == "Diagnosis: Adenocarcinoma, invasive."
+
+    def test_invalid_payload(self):
+        assert decode_presented_form("not base64!", "text/plain") == ""
+
     def test_empty_data(self):
         assert decode_presented_form("", "text/plain") == ""
 
 
 class TestParsePathologySections:
-    def test_extract_diagnosis(self):
-        text = """
-        SURGICAL PATHOLOGY REPORT
-        Diagnosis: Invasive adenocarcinoma of the colon, moderately differentiated.
-        pT4aN1a, 6/23 lymph nodes positive.
-        Gross Description: Sigmoid colon segment, 30 cm in length.
-        Microscopic Description: Tumor invades through muscularis propria.
-        """
+    @pytest.mark.parametrize(
+        ("text", "key", "expected"),
+        [
+            (_REPORT_TEXT, "diagnosis", "adenocarcinoma"),
+            ("Surgical margins are negative for malignancy.", "margins", "negative"),
+            ("4/14 lymph nodes positive for metastatic carcinoma.", "lymph_nodes", "4/14"),
+        ],
+        ids=["diagnosis", "margins", "lymph_nodes"],
+    )
+    def test_extract_section(self, text, key, expected):
         sections = parse_pathology_sections(text)
-        assert "adenocarcinoma" in sections["diagnosis"].lower()
+        assert expected in sections[key].lower()
 
     def test_extract_staging(self):
         text = "Stage pT4aN1a. Tumor invades through serosa."
         sections = parse_pathology_sections(text)
         assert sections["staging"] == "pT4aN1a"
 
-    def test_extract_margins(self):
-        text = "Surgical margins are negative for malignancy."
-        sections = parse_pathology_sections(text)
-        assert "negative" in sections["margins"].lower()
-
-    def test_extract_lymph_nodes(self):
-        text = "4/14 lymph nodes positive for metastatic carcinoma."
-        sections = parse_pathology_sections(text)
-        assert "4/14" in sections["lymph_nodes"]
-
     def test_empty_text(self):
         sections = parse_pathology_sections("")
         assert all(v == "" for v in sections.values())
@@ -90,6 +99,17 @@ class TestLinkage:
         links = link_pathology_to_procedures(pathology, procedures, max_days=14)
         assert len(links) == 0
 
+    def test_name_breaks_date_tie(self):
+        pathology = [
+            {"id": 1, "report_date": "2021-12-30", "specimen": "liver", "diagnosis": "metastasis"},
+        ]
+        procedures = [
+            {"id": 10, "procedure_date": "2021-12-29", "name": ""},
+            {"id": 11, "procedure_date": "2021-12-29", "name": "liver resection"},
+            {"id": 12, "procedure_date": "2021-12-29", "name": "EGD"},
+        ]
+        assert link_pathology_to_procedures(pathology, procedures) == [(1, 11)]
+
     def test_empty_inputs(self):
         assert link_pathology_to_procedures([], []) == []
 
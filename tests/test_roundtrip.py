@@ -7,6 +7,11 @@ These tests verify that record counts are preserved (or intentionally reduced
 via deduplication) at each stage transition.
 """
 
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pytest
+
 from chartfold.adapters.epic_adapter import epic_to_unified, _parser_counts as epic_parser_counts
 from chartfold.adapters.meditech_adapter import (
     meditech_to_unified,
@@ -16,38 +21,66 @@ from chartfold.adapters.athena_adapter import (
     athena_to_unified,
     _parser_counts as athena_parser_counts,
 )
+from chartfold.cli import _format_load_result, _print_load_result
+from chartfold.db import _LAST_LOAD_SQL, ChartfoldDB, LoadResult
+from chartfold.models import UnifiedRecords
+
+
+def _load_counts(template: ChartfoldDB, records) -> dict:
+    """load_source() counts for records loaded into a fresh copy of template."""
+    with ChartfoldDB(":memory:") as db:
+        template.conn.backup(db.conn)
+        return db.load_source(records)
+
+
+@pytest.fixture(scope="module")
+def epic_db_counts(schema_template, epic_unified):
+    return _load_counts(schema_template, epic_unified)
+
+
+@pytest.fixture(scope="module")
+def meditech_db_counts(schema_template, meditech_unified):
+    return _load_counts(schema_template, meditech_unified)
+
+
+@pytest.fixture(scope="module")
+def athena_db_counts(schema_template, athena_unified):
+    return _load_counts(schema_template, athena_unified)
+
+
+# Every key UnifiedRecords.counts() and load_source() report
+_COUNT_KEYS = frozenset(
+    {
+        "patients",
+        "documents",
+        "encounters",
+        "lab_results",
+        "vitals",
+        "medications",
+        "conditions",
+        "procedures",
+        "pathology_reports",
+        "imaging_reports",
+        "clinical_notes",
+        "immunizations",
+        "allergies",
+        "social_history",
+        "family_history",
+        "mental_status",
+        "source_assets",
+        "genetic_variants",
+    }
+)
 
 
 class TestUnifiedRecordsCounts:
     """Test that UnifiedRecords.counts() returns accurate counts."""
 
     def test_counts_empty(self):
-        from chartfold.models import UnifiedRecords
-
         records = UnifiedRecords(source="test")
         counts = records.counts()
-        expected_keys = {
-            "patients",
-            "documents",
-            "encounters",
-            "lab_results",
-            "vitals",
-            "medications",
-            "conditions",
-            "procedures",
-            "pathology_reports",
-            "imaging_reports",
-            "clinical_notes",
-            "immunizations",
-            "allergies",
-            "social_history",
-            "family_history",
-            "mental_status",
-            "source_assets",
-            "genetic_variants",
-        }
-        assert set(counts.keys()) == expected_keys
-        assert all(v == 0 for v in counts.values())
+        assert counts.keys() == _COUNT_KEYS
+        assert not any(counts.values())
 
     def test_counts_with_data(self, sample_unified_records):
         counts = sample_unified_records.counts()
@@ -58,37 +91,42 @@ class TestUnifiedRecordsCounts:
         assert counts["medications"] == 1
         assert counts["conditions"] == 1
 
-    def test_counts_keys_match_db_load(self, tmp_db, sample_unified_records):
+    def test_counts_keys_match_db_load(self, memory_db, sample_unified_records):
         """counts() keys should match the keys returned by db.load_source()."""
         adapter_counts = sample_unified_records.counts()
-        db_counts = tmp_db.load_source(sample_unified_records)
-        assert set(adapter_counts.keys()) == set(db_counts.keys())
-
-
-class TestEpicRoundTrip:
-    """Verify Epic pipeline preserves all records from parser through DB."""
-
-    def test_parser_counts_structure(self, sample_epic_data):
-        counts = epic_parser_counts(sample_epic_data)
-        assert isinstance(counts, dict)
-        assert counts["patients"] == 1
-        assert counts["documents"] == 2
-        assert counts["lab_results"] == 3  # 2 CBC components + 1 CEA
-        assert counts["medications"] == 2
-        assert counts["conditions"] == 2
-        assert counts["family_history"] == 2
-
-    def test_adapter_preserves_all_parser_records(self, sample_epic_data):
-        """Adapter output count should match parser input count.
-
-        Epic has no dedup in the adapter, so counts must match exactly
-        for all record types.
-        """
-        parser_counts = epic_parser_counts(sample_epic_data)
-        records = epic_to_unified(sample_epic_data)
-        adapter_counts = records.counts()
-
-        for key in (
+        db_counts = memory_db.load_source(sample_unified_records)
+        assert adapter_counts.keys() == db_counts.keys()
+
+
+@dataclass(frozen=True)
+class _RoundTripCase:
+    """One source's pipeline functions, sample fixtures and expected counts."""
+
+    parser_counts: Callable[[dict], dict[str, int]]
+    adapter: Callable[[dict], UnifiedRecords]
+    expected: dict[str, int]  # parser counts for the sample data
+    keys: tuple[str, ...]  # tables compared parser -> adapter -> DB
+    allow_dedup: bool  # adapter merges records, so counts may only shrink
+    empty: dict  # parser output with nothing extracted
+    sample_fixture: str
+    unified_fixture: str
+    db_counts_fixture: str
+    ignored_empty_keys: tuple[str, ...] = ()  # parser keys not zeroed when empty
+
+
+_ROUNDTRIP_SOURCES: dict[str, _RoundTripCase] = {
+    "epic": _RoundTripCase(
+        parser_counts=epic_parser_counts,
+        adapter=epic_to_unified,
+        expected={
+            "patients": 1,
+            "documents": 2,
+            "lab_results": 3,  # 2 CBC components + 1 CEA
+            "medications": 2,
+            "conditions": 2,
+            "family_history": 2,
+        },
+        keys=(
             "patients",
             "documents",
             "encounters",
@@ -104,81 +142,29 @@ class TestEpicRoundTrip:
             "social_history",
             "family_history",
             "procedures",
-        ):
-            assert adapter_counts[key] == parser_counts[key], (
-                f"{key}: parser={parser_counts[key]}, adapter={adapter_counts[key]}"
-            )
-
-    def test_db_preserves_all_adapter_records(self, tmp_db, sample_epic_data):
-        """DB should store exactly what the adapter produces."""
-        records = epic_to_unified(sample_epic_data)
-        adapter_counts = records.counts()
-        db_counts = tmp_db.load_source(records)
-
-        for key in adapter_counts:
-            assert db_counts[key] == adapter_counts[key], (
-                f"{key}: adapter={adapter_counts[key]}, db={db_counts[key]}"
-            )
-
-    def test_full_pipeline_roundtrip(self, tmp_db, sample_epic_data):
-        """End-to-end: parser counts == DB counts for Epic (no dedup)."""
-        parser_counts = epic_parser_counts(sample_epic_data)
-        records = epic_to_unified(sample_epic_data)
-        db_counts = tmp_db.load_source(records)
-
-        for key in (
-            "patients",
-            "documents",
-            "encounters",
-            "lab_results",
-            "medications",
-            "conditions",
-            "vitals",
-            "immunizations",
-            "allergies",
-            "social_history",
-            "family_history",
-            "procedures",
-        ):
-            assert db_counts[key] == parser_counts[key], (
-                f"{key}: parser={parser_counts[key]}, db={db_counts[key]}"
-            )
-
-    def test_empty_epic_data(self):
-        """Empty parser output should produce empty UnifiedRecords."""
-        data = {"inventory": [], "lab_results": [], "cea_values": [], "errors": []}
-        parser_counts = epic_parser_counts(data)
-        records = epic_to_unified(data)
-        adapter_counts = records.counts()
-        assert all(v == 0 for v in adapter_counts.values())
-        for key, val in parser_counts.items():
-            if key != "errors":
-                assert val == 0, f"parser {key}={val} should be 0"
-
-
-class TestMeditechRoundTrip:
-    """Verify MEDITECH pipeline — adapter may dedup, so count <= parser count."""
-
-    def test_parser_counts_structure(self, sample_meditech_data):
-        counts = meditech_parser_counts(sample_meditech_data)
-        assert isinstance(counts, dict)
-        assert counts["patients"] == 1
-        assert counts["documents"] == 1
-        assert counts["lab_results"] == 2  # 1 FHIR + 1 CCDA
-        assert counts["conditions"] == 2  # 1 FHIR + 1 CCDA
-        assert counts["imaging_reports"] == 1  # 1 FHIR diagnostic report (Radiology)
-        assert counts["allergies"] == 1  # 1 FHIR allergy intolerance
-        assert counts["procedures"] == 1  # 1 FHIR procedure
-        assert counts["social_history"] == 2  # 1 FHIR social-history + 1 CCDA
-        assert counts["mental_status"] == 2  # 1 FHIR survey + 1 CCDA
-
-    def test_adapter_output_lte_combined_parser_input(self, sample_meditech_data):
-        """Adapter may dedup, so count <= parser count for all keys."""
-        parser_counts = meditech_parser_counts(sample_meditech_data)
-        records = meditech_to_unified(sample_meditech_data)
-        adapter_counts = records.counts()
-
-        for key in (
+        ),
+        allow_dedup=False,
+        empty={"inventory": [], "lab_results": [], "cea_values": [], "errors": []},
+        sample_fixture="sample_epic_data",
+        unified_fixture="epic_unified",
+        db_counts_fixture="epic_db_counts",
+        ignored_empty_keys=("errors",),
+    ),
+    "meditech": _RoundTripCase(
+        parser_counts=meditech_parser_counts,
+        adapter=meditech_to_unified,
+        expected={
+            "patients": 1,
+            "documents": 1,
+            "lab_results": 2,  # 1 FHIR + 1 CCDA
+            "conditions": 2,  # 1 FHIR + 1 CCDA
+            "imaging_reports": 1,  # 1 FHIR diagnostic report (Radiology)
+            "allergies": 1,  # 1 FHIR allergy intolerance
+            "procedures": 1,  # 1 FHIR procedure
+            "social_history": 2,  # 1 FHIR social-history + 1 CCDA
+            "mental_status": 2,  # 1 FHIR survey + 1 CCDA
+        },
+        keys=(
             "lab_results",
             "conditions",
             "medications",
@@ -195,77 +181,18 @@ class TestMeditechRoundTrip:
             "social_history",
             "family_history",
             "mental_status",
-        ):
-            assert adapter_counts[key] <= parser_counts[key], (
-                f"{key}: adapter={adapter_counts[key]} > parser={parser_counts[key]}"
-            )
-
-    def test_adapter_never_creates_extra_records(self, sample_meditech_data):
-        """Adapter should never produce MORE records than the parser provided."""
-        parser_counts = meditech_parser_counts(sample_meditech_data)
-        records = meditech_to_unified(sample_meditech_data)
-        adapter_counts = records.counts()
-
-        for key in (
-            "patients",
-            "documents",
-            "encounters",
-            "procedures",
-            "pathology_reports",
-            "imaging_reports",
-            "clinical_notes",
-            "allergies",
-            "social_history",
-            "family_history",
-            "mental_status",
-            "lab_results",
-            "conditions",
-            "medications",
-            "vitals",
-            "immunizations",
-        ):
-            assert adapter_counts[key] <= parser_counts[key], (
-                f"{key}: adapter={adapter_counts[key]} > parser={parser_counts[key]}"
-            )
-
-    def test_db_preserves_all_adapter_records(self, tmp_db, sample_meditech_data):
-        """DB should store exactly what the adapter produces."""
-        records = meditech_to_unified(sample_meditech_data)
-        adapter_counts = records.counts()
-        db_counts = tmp_db.load_source(records)
-
-        for key in adapter_counts:
-            assert db_counts[key] == adapter_counts[key], (
-                f"{key}: adapter={adapter_counts[key]}, db={db_counts[key]}"
-            )
-
-    def test_empty_meditech_data(self):
-        """Empty parser output should produce empty UnifiedRecords."""
-        data = {"fhir_data": {}, "ccda_data": {}, "toc_data": []}
-        parser_counts = meditech_parser_counts(data)
-        records = meditech_to_unified(data)
-        adapter_counts = records.counts()
-        assert all(v == 0 for v in adapter_counts.values())
-        assert all(v == 0 for v in parser_counts.values())
-
-
-class TestAthenaRoundTrip:
-    """Verify Athena pipeline preserves all records (no dedup)."""
-
-    def test_parser_counts_structure(self, sample_athena_data):
-        counts = athena_parser_counts(sample_athena_data)
-        assert isinstance(counts, dict)
-        assert counts["patients"] == 1
-        assert counts["lab_results"] == 2
-        assert counts["vitals"] == 2
-
-    def test_adapter_preserves_all_parser_records(self, sample_athena_data):
-        """Athena has no dedup, so counts must match exactly."""
-        parser_counts = athena_parser_counts(sample_athena_data)
-        records = athena_to_unified(sample_athena_data)
-        adapter_counts = records.counts()
-
-        for key in (
+        ),
+        allow_dedup=True,
+        empty={"fhir_data": {}, "ccda_data": {}, "toc_data": []},
+        sample_fixture="sample_meditech_data",
+        unified_fixture="meditech_unified",
+        db_counts_fixture="meditech_db_counts",
+    ),
+    "athena": _RoundTripCase(
+        parser_counts=athena_parser_counts,
+        adapter=athena_to_unified,
+        expected={"patients": 1, "lab_results": 2, "vitals": 2},
+        keys=(
             "patients",
             "documents",
             "encounters",
@@ -280,224 +207,229 @@ class TestAthenaRoundTrip:
             "mental_status",
             "clinical_notes",
             "procedures",
-        ):
-            assert adapter_counts[key] == parser_counts[key], (
-                f"{key}: parser={parser_counts[key]}, adapter={adapter_counts[key]}"
-            )
-
-    def test_db_preserves_all_adapter_records(self, tmp_db, sample_athena_data):
+        ),
+        allow_dedup=False,
+        empty={},
+        sample_fixture="sample_athena_data",
+        unified_fixture="athena_unified",
+        db_counts_fixture="athena_db_counts",
+    ),
+}
+_SOURCE_NAMES = list(_ROUNDTRIP_SOURCES)
+# Sources whose adapters never dedup, so parser counts must survive to the DB
+_NO_DEDUP_SOURCES = [name for name, case in _ROUNDTRIP_SOURCES.items() if not case.allow_dedup]
+
+
+def _count_mismatches(expected, actual) -> dict[str, tuple]:
+    """Keys of expected whose count differs in actual, as (expected, actual)."""
+    return {k: (expected[k], actual.get(k)) for k in expected if actual.get(k) != expected[k]}
+
+
+class TestRoundTrip:
+    """Verify each source pipeline preserves records from parser through DB.
+
+    Epic and Athena adapters don't dedup, so counts must match exactly;
+    MEDITECH merges FHIR and CCDA, so adapter counts may only shrink.
+    """
+
+    @pytest.mark.parametrize("name", _SOURCE_NAMES)
+    def test_parser_counts_structure(self, name, request):
+        case = _ROUNDTRIP_SOURCES[name]
+        counts = case.parser_counts(request.getfixturevalue(case.sample_fixture))
+        assert isinstance(counts, dict)
+        assert {key: counts[key] for key in case.expected} == case.expected
+
+    @pytest.mark.parametrize("name", _SOURCE_NAMES)
+    def test_adapter_preserves_parser_records(self, name, request):
+        """Adapter count == parser count, or <= for sources that dedup."""
+        case = _ROUNDTRIP_SOURCES[name]
+        parsed = case.parser_counts(request.getfixturevalue(case.sample_fixture))
+        adapter_counts = request.getfixturevalue(case.unified_fixture).counts()
+
+        if case.allow_dedup:
+            mismatches = {
+                k: (parsed[k], adapter_counts[k])
+                for k in case.keys
+                if adapter_counts[k] > parsed[k]
+            }
+        else:
+            mismatches = _count_mismatches({k: parsed[k] for k in case.keys}, adapter_counts)
+        assert not mismatches, f"(parser, adapter) mismatches: {mismatches}"
+
+    @pytest.mark.parametrize("name", _SOURCE_NAMES)
+    def test_db_preserves_all_adapter_records(self, name, request):
         """DB should store exactly what the adapter produces."""
-        records = athena_to_unified(sample_athena_data)
-        adapter_counts = records.counts()
-        db_counts = tmp_db.load_source(records)
-
-        for key in adapter_counts:
-            assert db_counts[key] == adapter_counts[key], (
-                f"{key}: adapter={adapter_counts[key]}, db={db_counts[key]}"
-            )
-
-    def test_full_pipeline_roundtrip(self, tmp_db, sample_athena_data):
-        """End-to-end: parser counts == DB counts for Athena (no dedup)."""
-        parser_counts = athena_parser_counts(sample_athena_data)
-        records = athena_to_unified(sample_athena_data)
-        db_counts = tmp_db.load_source(records)
-
-        for key in (
-            "patients",
-            "documents",
-            "encounters",
-            "lab_results",
-            "vitals",
-            "medications",
-            "conditions",
-            "immunizations",
-            "allergies",
-            "social_history",
-            "family_history",
-            "mental_status",
-            "clinical_notes",
-            "procedures",
-        ):
-            assert db_counts[key] == parser_counts[key], (
-                f"{key}: parser={parser_counts[key]}, db={db_counts[key]}"
-            )
+        case = _ROUNDTRIP_SOURCES[name]
+        adapter_counts = request.getfixturevalue(case.unified_fixture).counts()
+        db_counts = request.getfixturevalue(case.db_counts_fixture)
+
+        mismatches = _count_mismatches(adapter_counts, db_counts)
+        assert not mismatches, f"(adapter, db) mismatches: {mismatches}"
 
-    def test_empty_athena_data(self):
+    @pytest.mark.parametrize("name", _NO_DEDUP_SOURCES)
+    def test_full_pipeline_roundtrip(self, name, request):
+        """End-to-end: parser counts == DB counts for sources without dedup."""
+        case = _ROUNDTRIP_SOURCES[name]
+        parsed = case.parser_counts(request.getfixturevalue(case.sample_fixture))
+        db_counts = request.getfixturevalue(case.db_counts_fixture)
+
+        mismatches = _count_mismatches({k: parsed[k] for k in case.keys}, db_counts)
+        assert not mismatches, f"(parser, db) mismatches: {mismatches}"
+
+    @pytest.mark.parametrize("name", _SOURCE_NAMES)
+    def test_empty_data(self, name):
         """Empty parser output should produce empty UnifiedRecords."""
-        data = {}
-        parser_counts = athena_parser_counts(data)
-        records = athena_to_unified(data)
-        adapter_counts = records.counts()
-        assert all(v == 0 for v in adapter_counts.values())
-        assert all(v == 0 for v in parser_counts.values())
+        case = _ROUNDTRIP_SOURCES[name]
+        parsed = case.parser_counts(case.empty)
+        records = case.adapter(case.empty)
+        assert not any(records.counts().values())
+        nonzero = {k: v for k, v in parsed.items() if v and k not in case.ignored_empty_keys}
+        assert not nonzero, f"parser counts should be 0: {nonzero}"
 
 
 class TestLastLoadCounts:
     """Test db.last_load_counts() retrieves correct historical data."""
 
-    def test_returns_none_for_unknown_source(self, tmp_db):
-        assert tmp_db.last_load_counts("nonexistent") is None
+    def test_returns_none_for_unknown_source(self, memory_db):
+        assert memory_db.last_load_counts("nonexistent") is None
 
-    def test_returns_counts_after_load(self, tmp_db, sample_unified_records):
-        tmp_db.load_source(sample_unified_records)
-        result = tmp_db.last_load_counts("test_source")
+    def test_returns_counts_after_load(self, memory_db, sample_unified_records):
+        memory_db.load_source(sample_unified_records)
+        result = memory_db.last_load_counts("test_source")
         assert result is not None
         assert result["patients"] == 1
         assert result["lab_results"] == 2
         assert result["medications"] == 1
 
-    def test_returns_latest_load(self, tmp_db, sample_unified_records):
+    def test_returns_latest_load(self, memory_db, sample_unified_records):
         """When loaded twice, should return the most recent counts."""
-        tmp_db.load_source(sample_unified_records)
+        memory_db.load_source(sample_unified_records)
 
         # Modify and load again
         sample_unified_records.lab_results = sample_unified_records.lab_results[:1]
-        tmp_db.load_source(sample_unified_records)
+        memory_db.load_source(sample_unified_records)
 
-        result = tmp_db.last_load_counts("test_source")
+        result = memory_db.last_load_counts("test_source")
         assert result["lab_results"] == 1  # Latest load had only 1
 
-    def test_counts_match_load_source_return(self, tmp_db, sample_unified_records):
+    def test_counts_match_load_source_return(self, memory_db, sample_unified_records):
         """last_load_counts() should match the dict returned by load_source()."""
-        db_counts = tmp_db.load_source(sample_unified_records)
-        log_counts = tmp_db.last_load_counts("test_source")
+        db_counts = memory_db.load_source(sample_unified_records)
+        log_counts = memory_db.last_load_counts("test_source")
         assert log_counts is not None
-        for key in db_counts:
-            assert log_counts[key] == db_counts[key], (
-                f"{key}: load_source={db_counts[key]}, last_load_counts={log_counts[key]}"
-            )
+        mismatches = _count_mismatches(db_counts, log_counts)
+        assert not mismatches, f"(load_source, last_load_counts) mismatches: {mismatches}"
+
+    def test_latest_load_lookup_uses_index(self, memory_db):
+        plan = memory_db.query(f"EXPLAIN QUERY PLAN {_LAST_LOAD_SQL}", ("test_source",))
+        assert "idx_load_log_source_ts" in plan[0]["detail"]
+        assert not any("TEMP B-TREE" in row["detail"] for row in plan)
 
 
 class TestIdempotentLoad:
     """Verify that loading the same source twice doesn't double records."""
 
-    def test_epic_idempotent(self, tmp_db, sample_epic_data):
-        records = epic_to_unified(sample_epic_data)
-        result1 = tmp_db.load_source(records)
-        result2 = tmp_db.load_source(records)
+    def test_epic_idempotent(self, memory_db, epic_unified):
+        records = epic_unified
+        result1 = memory_db.load_source(records)
+        result2 = memory_db.load_source(records)
         # Second load should be skipped (identical content hash)
         assert result2["skipped"] is True
 
         # DB totals should match single load (not doubled)
-        summary = tmp_db.summary()
-        for key in result1:
-            assert summary[key] == result1[key]
-
-    def test_athena_idempotent(self, tmp_db, sample_athena_data):
-        records = athena_to_unified(sample_athena_data)
-        tmp_db.load_source(records)
-        result2 = tmp_db.load_source(records)
+        assert not _count_mismatches(result1, memory_db.summary())
+
+    def test_athena_idempotent(self, memory_db, athena_unified):
+        records = athena_unified
+        memory_db.load_source(records)
+        result2 = memory_db.load_source(records)
         # Second load should be skipped (identical content hash)
         assert result2["skipped"] is True
 
 
-class TestStageComparison:
-    """Test the CLI _print_load_result display."""
+def _make_result(table_stats: dict[str, int]) -> LoadResult:
+    """Build a LoadResult where every table's records are all new."""
+    tables = {
+        k: {"new": v, "existing": 0, "removed": 0, "total": v} for k, v in table_stats.items()
+    }
+    return LoadResult(tables=tables, content_hash="test", skipped=False)
 
-    @staticmethod
-    def _make_result(table_stats):
-        """Build a LoadResult from a simple {table: total} dict."""
-        from chartfold.db import LoadResult
-        tables = {
-            k: {"new": v, "existing": 0, "removed": 0, "total": v}
-            for k, v in table_stats.items()
-        }
-        return LoadResult(tables=tables, content_hash="test", skipped=False)
 
-    def test_matching_counts_no_flags(self, capsys):
-        """When all stages match, no flags should be printed."""
-        from chartfold.cli import _print_load_result
-
-        counts = {"lab_results": 10, "medications": 5}
-        result = self._make_result(counts)
-        _print_load_result(result, counts, counts)
-        output = capsys.readouterr().out
-        assert "lab_results" in output
-        assert "(dedup)" not in output
-
-    def test_dedup_flagged(self, capsys):
-        """Parser > adapter should show (dedup) flag."""
-        from chartfold.cli import _print_load_result
-
-        parser = {"lab_results": 10}
-        adapter = {"lab_results": 8}
-        result = self._make_result(adapter)
-        _print_load_result(result, parser, adapter)
-        output = capsys.readouterr().out
-        assert "dedup" in output
-
-    def test_expand_flagged(self, capsys):
-        """Parser < adapter should show (expand) flag."""
-        from chartfold.cli import _print_load_result
-
-        parser = {"lab_results": 5}
-        adapter = {"lab_results": 10}
-        result = self._make_result(adapter)
-        _print_load_result(result, parser, adapter)
-        output = capsys.readouterr().out
-        assert "expand" in output
-
-    def test_all_zero_rows_hidden(self, capsys):
-        """Rows where all counts are 0 should not be displayed."""
-        from chartfold.cli import _print_load_result
-
-        parser = {"lab_results": 0, "medications": 5}
-        adapter = {"lab_results": 0, "medications": 5}
-        result = self._make_result(adapter)
-        _print_load_result(result, parser, adapter)
-        output = capsys.readouterr().out
-        assert "lab_results" not in output
-        assert "medications" in output
+class TestStageComparison:
+    """Test the CLI stage comparison rendering."""
+
+    @pytest.mark.parametrize(
+        ("parser", "adapter", "present", "absent"),
+        [
+            # All stages match: rows shown, no flags
+            (
+                {"lab_results": 10, "medications": 5},
+                {"lab_results": 10, "medications": 5},
+                "lab_results",
+                "(dedup)",
+            ),
+            # Parser > adapter: flagged as dedup
+            ({"lab_results": 10}, {"lab_results": 8}, "dedup", None),
+            # Parser < adapter: flagged as expand
+            ({"lab_results": 5}, {"lab_results": 10}, "expand", None),
+            # Rows where every count is 0 are hidden
+            (
+                {"lab_results": 0, "medications": 5},
+                {"lab_results": 0, "medications": 5},
+                "medications",
+                "lab_results",
+            ),
+        ],
+        ids=["match", "dedup", "expand", "zero-hidden"],
+    )
+    def test_stage_flags(self, parser, adapter, present, absent):
+        result = _make_result(adapter)
+        output = _format_load_result(result, parser, adapter)
+        assert present in output
+        if absent is not None:
+            assert absent not in output
 
     def test_empty_counts_prints_nothing(self, capsys):
         """All-empty input should produce no output."""
-        from chartfold.cli import _print_load_result
-        from chartfold.db import LoadResult
-
         result = LoadResult(tables={}, content_hash="test", skipped=False)
+        assert _format_load_result(result, {}, {}) == ""
         _print_load_result(result, {}, {})
         assert capsys.readouterr().out == ""
 
-    def test_diff_shows_new_count(self, capsys):
-        """Diff column should show +N for new records."""
-        from chartfold.cli import _print_load_result
-        from chartfold.db import LoadResult
+    def test_print_matches_format(self, capsys):
+        result = _make_result({"lab_results": 3})
+        counts = {"lab_results": 3}
+        _print_load_result(result, counts, counts)
+        assert capsys.readouterr().out == _format_load_result(result, counts, counts) + "\n"
 
+    def test_diff_shows_new_count(self):
+        """Diff column should show +N for new records."""
         tables = {
             "lab_results": {"new": 3, "existing": 7, "removed": 0, "total": 10},
         }
         result = LoadResult(tables=tables, content_hash="test", skipped=False)
-        _print_load_result(result, {"lab_results": 10}, {"lab_results": 10})
-        output = capsys.readouterr().out
+        output = _format_load_result(result, {"lab_results": 10}, {"lab_results": 10})
         assert "+3" in output
         assert "=7" in output
 
-    def test_diff_shows_removed_count(self, capsys):
+    def test_diff_shows_removed_count(self):
         """Diff column should show -N for removed records."""
-        from chartfold.cli import _print_load_result
-        from chartfold.db import LoadResult
-
         tables = {
             "lab_results": {"new": 0, "existing": 8, "removed": 2, "total": 8},
         }
         result = LoadResult(tables=tables, content_hash="test", skipped=False)
-        _print_load_result(result, {"lab_results": 8}, {"lab_results": 8})
-        output = capsys.readouterr().out
+        output = _format_load_result(result, {"lab_results": 8}, {"lab_results": 8})
         assert "-2" in output
 
-    def test_summary_line(self, capsys):
+    def test_summary_line(self):
         """Summary line should show totals."""
-        from chartfold.cli import _print_load_result
-        from chartfold.db import LoadResult
-
         tables = {
             "lab_results": {"new": 3, "existing": 7, "removed": 0, "total": 10},
             "medications": {"new": 1, "existing": 4, "removed": 0, "total": 5},
         }
         result = LoadResult(tables=tables, content_hash="test", skipped=False)
-        _print_load_result(
+        output = _format_load_result(
             result, {"lab_results": 10, "medications": 5}, {"lab_results": 10, "medications": 5}
         )
-        output = capsys.readouterr().out
         assert "4 new" in output
         assert "11 existing" in output